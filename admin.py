@@ -1,35 +1,117 @@
 # admin.py
 import streamlit as st
-import psycopg2
-from db_handler import get_connection  # You must have a get_connection() function
+import pandas as pd
+from psycopg2.extras import execute_values
+from db_handler import escape_like, get_connection, run_query, invalidate_tables  # Pooled connection helpers
+from keyset_pager import page_cursors, pager_controls
+from go_signin import invalidate_identity
+
+ROLES = ["user", "participant", "admin"]
+
+# Users listed per page.
+ADMIN_PAGE_SIZE = 50
+
+def fetch_users_page(search="", after=None, page_size=ADMIN_PAGE_SIZE):
+    """
+    One keyset page of users ordered by (created_at, user_id), optionally
+    filtered by an email or name prefix. Returns (rows, next_key or None).
+    """
+    where, params = [], []
+    if search:
+        prefix = escape_like(search) + "%"
+        where.append("(email ILIKE %s OR username ILIKE %s)")
+        params.extend([prefix, prefix])
+    if after is not None:
+        where.append("(created_at, user_id) > (%s, %s)")
+        params.extend(after)
+
+    sql = f"""
+    SELECT user_id, username, email, role, created_at
+      FROM users
+     {'WHERE ' + ' AND '.join(where) if where else ''}
+     ORDER BY created_at, user_id
+     LIMIT %s
+    """
+    rows = run_query(sql, (*params, page_size + 1))
+    if len(rows) <= page_size:
+        return rows, None
+    rows = rows[:page_size]
+    return rows, (rows[-1]["created_at"], rows[-1]["user_id"])
+
+def apply_role_changes(changes):
+    """
+    Apply {user_id: new_role} in ONE UPDATE ... FROM (VALUES ...).
+    Returns [(email, role)] for users whose role actually changed.
+    """
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            changed = execute_values(
+                cur,
+                """
+                UPDATE users AS u
+                   SET role = v.role
+                  FROM (VALUES %s) AS v(user_id, role)
+                 WHERE u.user_id = v.user_id
+                   AND u.role IS DISTINCT FROM v.role
+                RETURNING u.email, u.role
+                """,
+                [(int(uid), role) for uid, role in changes.items()],
+                fetch=True,
+            )
+    invalidate_tables("users")
+    for email, _ in changed:
+        invalidate_identity(email)
+    return changed
 
 def admin_panel():
     st.title("🔐 Admin Panel - Manage User Roles")
 
-    conn = get_connection()
-    cur = conn.cursor()
-
-    # Fetch all users and roles
-    cur.execute("SELECT user_id, username, email, role FROM users ORDER BY created_at;")
-    users = cur.fetchall()
-
-    st.subheader("All Registered Users")
-    for user_id, username, email, role in users:
-        col1, col2, col3 = st.columns([4, 4, 4])
-        with col1:
-            st.write(f"**{username}** ({email})")
-        with col2:
-            new_role = st.selectbox(
-                "Change Role",
-                options=["user", "participant", "admin"],
-                index=["user", "participant", "admin"].index(role),
-                key=f"role_{user_id}"
-            )
-        with col3:
-            if st.button("Update", key=f"update_{user_id}"):
-                cur.execute("UPDATE users SET role = %s WHERE user_id = %s", (new_role, user_id))
-                conn.commit()
-                st.success(f"Updated role for {username} to {new_role}")
-
-    cur.close()
-    conn.close()
+    search = st.text_input("Search by email or name (prefix)", key="admin_search").strip()
+
+    # Page cursors, reset whenever the search changes
+    cursors = page_cursors("admin", search)
+    pending = st.session_state.setdefault("admin_role_changes", {})
+
+    # Rows are fetched up front; no connection is held while widgets render
+    users, next_key = fetch_users_page(search, after=cursors[-1])
+
+    st.subheader("Registered Users")
+    if not users:
+        st.info("No users match this search.")
+    else:
+        df = pd.DataFrame(users, columns=["user_id", "username", "email", "role", "created_at"])
+        original = dict(zip(df["user_id"], df["role"]))
+        # Show staged (not yet applied) roles from earlier edits on this page
+        df["role"] = [pending.get(uid, role) for uid, role in zip(df["user_id"], df["role"])]
+
+        edited = st.data_editor(
+            df,
+            key=f"admin_editor_{len(cursors)}_{search}",
+            hide_index=True,
+            disabled=["user_id", "username", "email", "created_at"],
+            column_config={
+                "role": st.column_config.SelectboxColumn("Role", options=ROLES, required=True),
+                "created_at": st.column_config.DatetimeColumn("Created", format="YYYY-MM-DD"),
+            },
+            use_container_width=True,
+        )
+
+        # Stage edits; reverting a role to its stored value un-stages it
+        for uid, role in zip(edited["user_id"], edited["role"]):
+            if role != original[uid]:
+                pending[uid] = role
+            else:
+                pending.pop(uid, None)
+
+    pager_controls("admin", cursors, next_key, f"Page {len(cursors)}")
+
+    st.divider()
+    st.write(f"**Staged role changes:** {len(pending)}")
+    a1, a2 = st.columns([1, 1])
+    if a1.button("Apply role changes", disabled=not pending, type="primary"):
+        changed = apply_role_changes(pending)
+        pending.clear()
+        st.success(f"Updated {len(changed)} user role(s): " + ", ".join(f"{e} → {r}" for e, r in changed))
+    if a2.button("Discard staged changes", disabled=not pending):
+        pending.clear()
+        st.rerun()
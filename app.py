@@ -2,13 +2,9 @@ import streamlit as st
 
 from sidebar import render_sidebar
 from theme import configure_theme, apply_theme
-from overview import overview
-from edit import edit
-from addgroup import add_group
-from tracking import tracking
-from visualization import visualization
-from settings import settings
-from admin import admin_panel
+from page_registry import can_access, get_page, normalize_role  # pages are imported lazily on first visit
+from db_handler import begin_rerun, set_rerun_page
+from profiler import profiling_controls, profile_call, render_profile_report
 
 # Google Sign-In only
 from go_signin import google_signin
@@ -16,6 +12,7 @@ from go_signin import google_signin
 st.set_page_config(page_title="Quraa Management System", layout="wide")
 
 def main():
+    begin_rerun()  # attribute this run's queries to a fresh rerun record
     configure_theme()
     apply_theme()
 
@@ -26,7 +23,7 @@ def main():
     _show_main_interface(user_info)
 
 def _show_main_interface(user_info):
-    role = user_info["role"]
+    role = normalize_role(user_info["role"])
     st.sidebar.write(f"Logged in as: **{user_info['name']}** ({user_info['email']})")
     st.sidebar.write(f"**Role:** {role.title()}")
 
@@ -37,28 +34,20 @@ def _show_main_interface(user_info):
 
     # Navigation
     page = render_sidebar(role)
-
-    if page == "Overview":
-        overview()
-
-    elif page == "Visualization" and role in ["participant", "admin"]:
-        visualization()
-
-    elif page == "Add Group" and role == "admin":
-        add_group()
-
-    elif page == "Edit" and role == "admin":
-        edit()
-
-    elif page == "Tracking" and role == "admin":
-        tracking()
-
-    elif page == "Settings" and role == "admin":
-        settings()
-
-    elif page == "Admin Panel" and role == "admin":
-        admin_panel()
-
+    set_rerun_page(page)
+
+    if can_access(page, role):
+        profile_mode = profiling_controls() if role == "admin" else None
+        if profile_mode:
+            # A profiled run that ended in st.rerun()/st.stop() never reached
+            # the render below; its report is still in session state.
+            interrupted = st.session_state.pop("last_profile", None)
+            if interrupted:
+                render_profile_report(interrupted)
+            profile_call(get_page(page), page, profile_mode)
+            render_profile_report(st.session_state.pop("last_profile"))
+        else:
+            get_page(page)()
     else:
         st.warning("🚫 You do not have access to this page.")
 
@@ -0,0 +1,12 @@
+# benchmarks
+"""
+Benchmark suite for the data functions behind each page.
+
+    python -m benchmarks.datagen --dsn postgres://localhost/quraa_bench --groups 10 --participants 50 --rounds 20
+    python -m benchmarks.run --dsn postgres://localhost/quraa_bench --scale 1k 10k 100k --output results.json
+    python -m benchmarks.compare before.json after.json
+    python -m benchmarks.load --dsn postgres://localhost/quraa_bench --scale 10k --sessions 1 4 16
+
+Always point these at a throwaway local database: the generator
+TRUNCATEs every Quraa table before seeding it.
+"""
@@ -0,0 +1,49 @@
+# benchmarks/compare.py
+"""
+Compare two benchmarks.run JSON reports case by case (median times).
+
+    python -m benchmarks.compare before.json after.json
+"""
+
+import argparse
+import json
+import sys
+
+def _medians(report):
+    return {
+        (entry["scale"], name): stats["median_ms"]
+        for entry in report["scales"]
+        for name, stats in entry["results"].items()
+    }
+
+def compare(before, after):
+    """
+    Rows of (scale, case, before_ms, after_ms, after/before) for every case
+    present in both reports.
+    """
+    old, new = _medians(before), _medians(after)
+    return [
+        (scale, name, old[key], new[key], new[key] / old[key] if old[key] else float("inf"))
+        for key in old if key in new
+        for scale, name in [key]
+    ]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare two Quraa benchmark reports.")
+    parser.add_argument("before")
+    parser.add_argument("after")
+    args = parser.parse_args(argv)
+
+    with open(args.before) as f:
+        before = json.load(f)
+    with open(args.after) as f:
+        after = json.load(f)
+
+    print(f"before: {before['meta'].get('commit')}   after: {after['meta'].get('commit')}")
+    print(f"{'scale':<6} {'case':<42} {'before ms':>10} {'after ms':>10} {'ratio':>7}")
+    for scale, name, old_ms, new_ms, ratio in compare(before, after):
+        print(f"{scale:<6} {name:<42} {old_ms:>10.2f} {new_ms:>10.2f} {ratio:>6.2f}x")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,179 @@
+# benchmarks/datagen.py
+"""
+Synthetic Quraa dataset: N groups x M participants x R weekly rounds,
+generated server-side with generate_series (1M contribution rows in a
+few seconds).
+
+Distributions:
+  - each group starts somewhere between "today" and R weeks ago, so the
+    data mixes finished, running and just-started groups
+  - due rounds are paid with probability `paid_rate`, except the two most
+    recent weeks which are paid with `late_rate` (what the alerts surface)
+  - a participant's payout round is received with `received_rate` once due
+  - participants share rounds evenly (M must be a multiple of R)
+
+    python -m benchmarks.datagen --dsn postgres://localhost/quraa_bench --groups 10 --participants 50 --rounds 20
+"""
+
+import argparse
+import datetime
+import os
+import sys
+import time
+
+import psycopg2
+
+from migrations import apply_migrations
+
+DEFAULT_PAID_RATE = 0.92
+DEFAULT_LATE_RATE = 0.55
+DEFAULT_RECEIVED_RATE = 0.95
+DEFAULT_USERS = 1000
+ROUND_DAYS = 7
+
+TABLES = ["contributions", "receivables", "rounds", "participants", "groups", "users"]
+
+SEED_SQL = [
+    ("groups", """
+        INSERT INTO groups (group_name, start_date, total_rounds, monthly_contribution)
+        SELECT 'Bench Group ' || lpad(g::text, 6, '0'),
+               %(today)s::date - (%(round_days)s * floor(random() * (%(rounds)s + 1)))::int,
+               %(rounds)s,
+               (ARRAY[100, 250, 500, 1000])[1 + floor(random() * 4)::int]
+          FROM generate_series(1, %(groups)s) AS g
+    """),
+    ("participants", """
+        INSERT INTO participants (participant_name, group_id, participant_order, contribution,
+                                  share_fraction, participant_contact_info)
+        SELECT 'Participant ' || g.group_id || '-' || i,
+               g.group_id,
+               (i - 1) * %(rounds)s / %(participants)s + 1,
+               g.monthly_contribution * %(rounds)s / %(participants)s,
+               %(rounds)s::numeric / %(participants)s,
+               '+964 770 ' || lpad((g.group_id * %(participants)s + i)::text, 7, '0')
+          FROM groups g
+         CROSS JOIN generate_series(1, %(participants)s) AS i
+    """),
+    ("rounds", """
+        INSERT INTO rounds (group_id, round_number, round_date, round_status)
+        SELECT g.group_id, r, g.start_date + %(round_days)s * (r - 1),
+               CASE WHEN g.start_date + %(round_days)s * (r - 1) <= %(today)s THEN 'Completed' ELSE 'Pending' END
+          FROM groups g
+         CROSS JOIN generate_series(1, %(rounds)s) AS r
+    """),
+    ("contributions", """
+        INSERT INTO contributions (group_id, round_number, participant_id, paid_yesno, paid_date)
+        SELECT p.group_id, rd.round_number, p.participant_id, pay.paid_yesno,
+               CASE WHEN pay.paid_yesno = 'Yes'
+                    THEN LEAST(%(today)s::date, rd.round_date + floor(random() * 7)::int) END
+          FROM participants p
+          JOIN rounds rd ON rd.group_id = p.group_id
+         CROSS JOIN LATERAL (
+               SELECT CASE
+                        WHEN rd.round_date > %(today)s THEN 'No'
+                        WHEN random() < CASE WHEN rd.round_date > %(today)s::date - 14
+                                             THEN %(late_rate)s ELSE %(paid_rate)s END THEN 'Yes'
+                        ELSE 'No'
+                      END AS paid_yesno
+         ) AS pay
+    """),
+    ("receivables", """
+        INSERT INTO receivables (group_id, round_number, participant_id, received_yesno,
+                                 received_date, received_amount)
+        SELECT p.group_id, p.participant_order, p.participant_id,
+               CASE WHEN rec.received THEN 'Yes' ELSE 'No' END,
+               CASE WHEN rec.received THEN LEAST(%(today)s::date, rd.round_date + floor(random() * 5)::int) END,
+               CASE WHEN rec.received THEN g.monthly_contribution * %(rounds)s * p.share_fraction ELSE 0 END
+          FROM participants p
+          JOIN groups g ON g.group_id = p.group_id
+          JOIN rounds rd ON rd.group_id = p.group_id AND rd.round_number = p.participant_order
+         CROSS JOIN LATERAL (
+               SELECT rd.round_date <= %(today)s AND random() < %(received_rate)s AS received
+         ) AS rec
+    """),
+    ("users", """
+        INSERT INTO users (username, email, role, created_at)
+        SELECT 'Bench User ' || u,
+               'bench.user' || u || '@example.com',
+               (ARRAY['participant', 'participant', 'participant', 'user', 'admin'])[1 + u %% 5],
+               now() - make_interval(hours => u)
+          FROM generate_series(1, %(users)s) AS u
+    """),
+]
+
+def generate(conn, groups, participants, rounds, users=DEFAULT_USERS, seed=0.42, today=None,
+             paid_rate=DEFAULT_PAID_RATE, late_rate=DEFAULT_LATE_RATE,
+             received_rate=DEFAULT_RECEIVED_RATE, log=print):
+    """
+    Replace the contents of every Quraa table with a synthetic dataset
+    (one transaction) and ANALYZE it. Returns {table: row count, "seconds": ...}.
+    """
+    if participants < rounds or participants % rounds:
+        raise ValueError("participants must be a multiple of rounds so every round sums to 1.0")
+
+    apply_migrations(conn, log=log)
+    params = {
+        "groups": groups, "participants": participants, "rounds": rounds, "users": users,
+        "today": today or datetime.date.today(), "round_days": ROUND_DAYS,
+        "paid_rate": paid_rate, "late_rate": late_rate, "received_rate": received_rate,
+    }
+
+    started = time.perf_counter()
+    counts = {}
+    try:
+        with conn.cursor() as cur:
+            cur.execute(f"TRUNCATE {', '.join(TABLES)} RESTART IDENTITY")
+            cur.execute("SELECT setseed(%s)", (seed,))
+            for table, sql in SEED_SQL:
+                cur.execute(sql, params)
+                counts[table] = cur.rowcount
+                log(f"  {table:<14} {cur.rowcount:>10,} rows")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    # ANALYZE cannot run inside a transaction block.
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cur:
+            cur.execute(f"ANALYZE {', '.join(TABLES)}")
+    finally:
+        conn.autocommit = False
+
+    counts["seconds"] = round(time.perf_counter() - started, 2)
+    return counts
+
+def bench_dsn(dsn=None):
+    """
+    The benchmark database: --dsn or $QURAA_BENCH_DSN. Deliberately never
+    falls back to secrets.toml, since seeding wipes every table.
+    """
+    return dsn or os.environ.get("QURAA_BENCH_DSN")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Seed a local database with a synthetic Quraa dataset.")
+    parser.add_argument("--dsn", default=None, help="PostgreSQL DSN (default: $QURAA_BENCH_DSN)")
+    parser.add_argument("--groups", type=int, required=True)
+    parser.add_argument("--participants", type=int, required=True, help="participants per group")
+    parser.add_argument("--rounds", type=int, required=True, help="rounds per group")
+    parser.add_argument("--users", type=int, default=DEFAULT_USERS)
+    parser.add_argument("--seed", type=float, default=0.42, help="setseed() value in [-1, 1]")
+    args = parser.parse_args(argv)
+
+    dsn = bench_dsn(args.dsn)
+    if not dsn:
+        parser.error("No DSN given (--dsn or $QURAA_BENCH_DSN).")
+
+    conn = psycopg2.connect(dsn)
+    try:
+        counts = generate(conn, args.groups, args.participants, args.rounds, users=args.users, seed=args.seed)
+    except ValueError as e:
+        parser.error(str(e))
+    finally:
+        conn.close()
+    print(f"Seeded {counts['contributions']:,} contribution rows in {counts['seconds']} s.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
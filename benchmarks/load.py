@@ -0,0 +1,356 @@
+# benchmarks/load.py
+"""
+Headless load harness: K concurrent Streamlit sessions (AppTest) clicking
+through Overview, Tracking, Visualization and Add Group against a
+synthetic dataset, all inside one process like the real server, sharing
+its connection pool, query cache and thread pool.
+
+For every session count it reports rerun latency percentiles (overall
+and per page), throughput, queries and DB time per rerun (from
+db_handler's query stats) and the process's peak RSS, so you can see
+where the process saturates: throughput stops growing while p95 keeps
+climbing.
+
+    python -m benchmarks.load --dsn postgres://localhost/quraa_bench --scale 10k --sessions 1 4 16 32
+    python -m benchmarks.load --skip-generate --sessions 8 --iterations 5 --pages overview tracking
+
+Sign-in is stubbed (benchmarks/load_app.py); nothing is written to the
+database, the Add Group scenario stops at the round preview.
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import psycopg2
+
+from benchmarks.datagen import bench_dsn, generate
+from benchmarks.run import SCALES, _git_commit, _log
+
+APP_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "load_app.py")
+
+DEFAULT_SESSIONS = [1, 4, 8, 16]
+DEFAULT_ITERATIONS = 3
+DEFAULT_TIMEOUT = 60.0      # seconds a single rerun may take
+RSS_SAMPLE_INTERVAL = 0.05  # seconds
+
+# ───────────────────────────── scenarios ─────────────────────────────
+# Each scenario is a list of (step, action); the action changes widgets on
+# the AppTest and the harness times the rerun that follows. Actions return
+# False to skip the rerun (e.g. a button that is disabled).
+
+def _navigate(page):
+    def action(at, rng):
+        at.sidebar.radio[0].set_value(page)
+    return action
+
+def _by_label(widgets, prefix):
+    for widget in widgets:
+        if widget.label.startswith(prefix):
+            return widget
+    return None
+
+def _pick(kind, label):
+    def action(at, rng):
+        widget = _by_label(getattr(at, kind), label)
+        if widget is None or not widget.options:
+            return False
+        widget.set_value(rng.choice(list(widget.options)))
+    return action
+
+def _set(kind, key, value):
+    def action(at, rng):
+        try:
+            getattr(at, kind)(key=key).set_value(value)
+        except KeyError:
+            return False
+    return action
+
+def _click(key):
+    def action(at, rng):
+        try:
+            button = at.button(key=key)
+        except KeyError:
+            return False
+        if button.disabled:
+            return False
+        button.click()
+    return action
+
+def _fill_participants(count):
+    def action(at, rng):
+        widget = _by_label(at.number_input, "Number of Participants")
+        if widget is None:
+            return False
+        widget.set_value(count)
+    return action
+
+def _fill_fractions(fractions):
+    def action(at, rng):
+        for i, fraction in enumerate(fractions):
+            try:
+                at.text_input(key=f"name_{i}").set_value(f"Load {i + 1}")
+                at.number_input(key=f"fraction_{i}").set_value(fraction)
+            except KeyError:
+                return False
+    return action
+
+SCENARIOS = {
+    "overview": ("Overview", [
+        ("open", _navigate("Overview")),
+        ("pick group", _pick("selectbox", "Select a group")),
+        ("next page", _click("detail_next")),
+        ("filter unpaid", _set("selectbox", "detail_paid", "No")),
+        ("clear filter", _set("selectbox", "detail_paid", "All")),
+    ]),
+    "tracking": ("Tracking", [
+        ("open", _navigate("Tracking")),
+        ("show all unpaid", _set("toggle", "alerts_unpaid_all", True)),
+        ("pick group", _pick("selectbox", "Select Group (Payments)")),
+        ("pick round", _pick("selectbox", "Select Round (Payments)")),
+        ("hide all unpaid", _set("toggle", "alerts_unpaid_all", False)),
+    ]),
+    "visualization": ("Visualization", [
+        ("open", _navigate("Visualization")),
+        ("rerun", lambda at, rng: None),
+    ]),
+    "add_group": ("Add Group", [
+        ("open", _navigate("Add Group")),
+        ("participants", _fill_participants(4)),
+        ("fractions", _fill_fractions([0.5, 0.5, 0.25, 0.75])),
+        ("scheduler", _pick("selectbox", "Round Scheduling")),
+    ]),
+}
+
+# ───────────────────────────── measurement ─────────────────────────────
+
+class PeakRss:
+    """
+    Samples the process's resident set size on a background thread and
+    keeps the peak. Falls back to ru_maxrss (a lifetime high-water mark)
+    where /proc is not available.
+    """
+
+    def __init__(self, interval=RSS_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.start_mb = self.peak_mb = self.current_mb()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True, name="quraa-rss")
+
+    @staticmethod
+    def current_mb():
+        try:
+            with open("/proc/self/statm") as f:
+                return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+        except (OSError, ValueError):
+            import resource
+            maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            return maxrss / 2**20 if sys.platform == "darwin" else maxrss / 1024
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.peak_mb = max(self.peak_mb, self.current_mb())
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak_mb = max(self.peak_mb, self.current_mb())
+
+def _latency_summary(times):
+    if not times:
+        return {"reruns": 0}
+    times = sorted(times)
+    q = statistics.quantiles(times, n=100, method="inclusive") if len(times) > 1 else [times[0]] * 99
+    return {
+        "reruns": len(times),
+        "p50_ms": round(q[49], 1),
+        "p95_ms": round(q[94], 1),
+        "p99_ms": round(q[98], 1),
+        "max_ms": round(times[-1], 1),
+        "mean_ms": round(statistics.fmean(times), 1),
+    }
+
+# ───────────────────────────── sessions ─────────────────────────────
+
+def _new_session(role, index, timeout):
+    from streamlit.testing.v1 import AppTest
+    at = AppTest.from_file(APP_SCRIPT, default_timeout=timeout)
+    at.session_state["load_user"] = {
+        "name": f"Load {role.title()} {index}",
+        "email": f"load.{role}{index}@example.com",
+        "role": role,
+    }
+    at.session_state["load_session"] = f"load-{index}-{uuid.uuid4().hex[:8]}"
+    return at
+
+def _run_session(index, role, pages, iterations, timeout, seed, start):
+    """
+    One simulated user: sign in, then walk every scenario `iterations`
+    times in a per-session random order. Returns one sample per rerun.
+    """
+    rng = random.Random(seed * 1000 + index)
+    samples = []
+
+    def timed_run(at, page, step):
+        started = time.perf_counter()
+        error = None
+        try:
+            at.run(timeout=timeout)
+            if at.exception:
+                error = at.exception[0].message
+        except Exception as e:  # a rerun that times out or crashes the script
+            error = f"{type(e).__name__}: {e}"
+        samples.append({"session": index, "page": page, "step": step,
+                        "ms": 1000 * (time.perf_counter() - started), "error": error})
+
+    at = _new_session(role, index, timeout)
+    start.wait()
+    timed_run(at, "(sign-in)", "first run")
+    for _ in range(iterations):
+        for name in rng.sample(pages, len(pages)):
+            page, steps = SCENARIOS[name]
+            for step, action in steps:
+                if action(at, rng) is False:
+                    continue
+                timed_run(at, page, step)
+    return samples
+
+def _roles(sessions, participant_ratio):
+    participants = round(sessions * participant_ratio)
+    return ["participant"] * participants + ["admin"] * (sessions - participants)
+
+def run_level(sessions, pages, iterations, timeout, participant_ratio=0.0, seed=0):
+    """
+    Run `sessions` concurrent sessions to completion and summarise them.
+    Participants only walk the pages their role can open.
+    """
+    from db_handler import get_query_stats, pool_stats
+    from page_registry import can_access
+
+    stats = get_query_stats()
+    stats.reset()
+    start = threading.Barrier(sessions)
+    roles = _roles(sessions, participant_ratio)
+
+    with PeakRss() as rss, ThreadPoolExecutor(max_workers=sessions, thread_name_prefix="quraa-load") as pool:
+        started = time.perf_counter()
+        futures = [
+            pool.submit(_run_session, i, role,
+                        [p for p in pages if can_access(SCENARIOS[p][0], role)],
+                        iterations, timeout, seed, start)
+            for i, role in enumerate(roles)
+        ]
+        samples = [s for f in futures for s in f.result()]
+        wall = time.perf_counter() - started
+
+    by_page = {}
+    for s in samples:
+        by_page.setdefault(s["page"], []).append(s["ms"])
+    db = {row["page"]: row for row in stats.page_summary()}
+    errors = [s for s in samples if s["error"]]
+
+    return {
+        "sessions": sessions,
+        "roles": {role: roles.count(role) for role in set(roles)},
+        "wall_s": round(wall, 2),
+        "reruns_per_s": round(len(samples) / wall, 2) if wall else None,
+        "latency": _latency_summary([s["ms"] for s in samples]),
+        "pages": {
+            page: dict(
+                _latency_summary(times),
+                **{k: db[page][k] for k in ("queries/rerun", "db ms/rerun", "rows/rerun",
+                                             "acquire p95 ms", "cache hits/rerun") if page in db},
+            )
+            for page, times in by_page.items()
+        },
+        "errors": len(errors),
+        "first_errors": sorted({f"{e['page']} / {e['step']}: {e['error']}" for e in errors})[:5],
+        "rss_start_mb": round(rss.start_mb, 1),
+        "rss_peak_mb": round(rss.peak_mb, 1),
+        "rss_per_session_mb": round((rss.peak_mb - rss.start_mb) / sessions, 2),
+        "pool": pool_stats(),
+    }
+
+def _print_table(levels):
+    _log(f"{'sessions':>8} {'reruns/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7} {'peak MB':>8}")
+    for level in levels:
+        lat = level["latency"]
+        _log(f"{level['sessions']:>8} {level['reruns_per_s']:>9} {lat.get('p50_ms', '-'):>8} "
+             f"{lat.get('p95_ms', '-'):>8} {lat.get('p99_ms', '-'):>8} {level['errors']:>7} {level['rss_peak_mb']:>8}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test Quraa's pages with concurrent headless Streamlit sessions.")
+    parser.add_argument("--dsn", default=None, help="PostgreSQL DSN (default: $QURAA_BENCH_DSN)")
+    parser.add_argument("--scale", choices=list(SCALES), default="10k")
+    parser.add_argument("--skip-generate", action="store_true", help="reuse the data already in the database")
+    parser.add_argument("--sessions", nargs="+", type=int, default=DEFAULT_SESSIONS, help="concurrent session counts to try")
+    parser.add_argument("--iterations", type=int, default=DEFAULT_ITERATIONS, help="passes over the pages per session")
+    parser.add_argument("--pages", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--participant-ratio", type=float, default=0.0,
+                        help="share of sessions signed in as participants instead of admins")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="seconds allowed per rerun")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    dsn = bench_dsn(args.dsn)
+    if not dsn:
+        parser.error("No DSN given (--dsn or $QURAA_BENCH_DSN).")
+    # db_handler builds its pool from $QURAA_DSN when set.
+    os.environ["QURAA_DSN"] = dsn
+
+    conn = psycopg2.connect(dsn)
+    try:
+        if not args.skip_generate:
+            groups, participants, rounds = SCALES[args.scale]
+            _log(f"[{args.scale}] generating {groups} x {participants} x {rounds}")
+            generate(conn, groups, participants, rounds, log=_log)
+        server_version = conn.server_version
+    finally:
+        conn.close()
+
+    levels = []
+    for sessions in args.sessions:
+        _log(f"[{sessions} sessions] running {', '.join(args.pages)} x {args.iterations}")
+        levels.append(run_level(sessions, args.pages, args.iterations, args.timeout,
+                                args.participant_ratio, args.seed))
+    _print_table(levels)
+
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "postgres": server_version,
+            "scale": None if args.skip_generate else args.scale,
+            "iterations": args.iterations,
+            "pages": args.pages,
+        },
+        "levels": levels,
+    }
+
+    text = json.dumps(report, indent=2, default=str)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+        _log(f"Wrote {args.output}")
+    else:
+        print(text)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,23 @@
+# benchmarks/load_app.py
+"""
+Entry script for the load harness (benchmarks/load.py). Runs app.main()
+with Google sign-in replaced by the identity the harness stored in the
+session, so AppTest sessions never reach st.login().
+"""
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+import app
+
+def _stub_signin():
+    return st.session_state["load_user"]
+
+# AppTest gives every session the same id; use the harness's own so
+# db_handler's per-rerun query stats don't mix concurrent sessions.
+ctx = get_script_run_ctx()
+if ctx is not None and "load_session" in st.session_state:
+    ctx.session_id = st.session_state["load_session"]
+
+app.google_signin = _stub_signin
+app.main()
@@ -0,0 +1,336 @@
+# benchmarks/run.py
+"""
+Time the data functions behind each page against a synthetic dataset and
+report the results as JSON, one entry per scale, so runs can be compared
+across commits (see benchmarks/compare.py).
+
+    python -m benchmarks.run --dsn postgres://localhost/quraa_bench --scale 1k 10k --output results.json
+    python -m benchmarks.run --scale 1m --only overview dashboard --repeat 3
+
+Queries are timed cold: the query cache is cleared before every call.
+"""
+
+import argparse
+import datetime
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+import numpy as np
+import openpyxl
+import pandas as pd
+import psycopg2
+
+from benchmarks.datagen import bench_dsn, generate
+
+# scale name -> (groups, participants per group, rounds); contribution rows = product
+SCALES = {
+    "1k": (5, 20, 10),
+    "10k": (25, 20, 20),
+    "100k": (40, 50, 50),
+    "1m": (200, 100, 50),
+}
+
+DEFAULT_REPEAT = 5
+
+# Groups written per bulk-import run (participants/rounds follow the scale).
+BULK_IMPORT_GROUPS = 5
+
+BENCH_PREFIX = "bench-write-"
+
+def _log(message):
+    print(message, file=sys.stderr, flush=True)
+
+def _timed(fn, repeat, setup=None):
+    """
+    Call fn() `repeat` times (after one untimed warm-up) and summarise the
+    wall times in milliseconds. setup() runs untimed before every call.
+    """
+    if setup:
+        setup()
+    fn()
+    times = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        started = time.perf_counter()
+        fn()
+        times.append(1000 * (time.perf_counter() - started))
+    times.sort()
+    return {
+        "runs": repeat,
+        "min_ms": round(times[0], 3),
+        "median_ms": round(statistics.median(times), 3),
+        "p95_ms": round(times[min(len(times) - 1, int(0.95 * len(times)))], 3),
+        "mean_ms": round(statistics.fmean(times), 3),
+    }
+
+def _largest_group_id():
+    from db_handler import run_query
+    return run_query("""
+        SELECT group_id FROM contributions
+         GROUP BY group_id ORDER BY COUNT(*) DESC, group_id LIMIT 1
+    """)[0]["group_id"]
+
+def _delete_bench_groups():
+    from db_handler import get_connection, invalidate_tables
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT group_id FROM groups WHERE group_name LIKE %s", (BENCH_PREFIX + "%",))
+            ids = [row[0] for row in cur.fetchall()]
+            for table in ("contributions", "receivables", "rounds", "participants", "groups"):
+                cur.execute(f"DELETE FROM {table} WHERE group_id = ANY(%s)", (ids,))
+    invalidate_tables("contributions", "receivables", "rounds", "participants", "groups")
+
+def _fractions(n_participants, n_rounds, rng):
+    """
+    Shares for n_participants that fill n_rounds exactly, mixing whole,
+    half, third and quarter shares in spreadsheet (round) order.
+    """
+    per_round = n_participants // n_rounds
+    patterns = {1: [[1.0]], 2: [[0.5, 0.5]], 3: [[1 / 3] * 3, [0.5, 0.25, 0.25]], 4: [[0.25] * 4, [0.5, 0.25, 0.125, 0.125]]}
+    options = patterns.get(per_round, [[1.0 / per_round] * per_round])
+    return np.concatenate([options[rng.integers(len(options))] for _ in range(n_rounds)])
+
+def _bulk_upload(kind, n_groups, n_participants, n_rounds, rng, tag):
+    start = datetime.date.today().isoformat()
+    rows = [
+        {
+            "Group Name": f"{BENCH_PREFIX}{tag}-{g}",
+            "Start Date": start,
+            "Round Duration": "monthly",
+            "Base Contribution": 500,
+            "Participant Name": f"Importee {g}-{i}",
+            "Contact Info": f"+964 750 {g:03d}{i:04d}",
+            "Share Fraction": fraction,
+        }
+        for g in range(n_groups)
+        for i, fraction in enumerate(_fractions(n_participants, n_rounds, rng))
+    ]
+    buf = io.BytesIO()
+    if kind == "csv":
+        pd.DataFrame(rows).to_csv(buf, index=False)
+    else:
+        wb = openpyxl.Workbook(write_only=True)
+        ws = wb.create_sheet()
+        ws.append(list(rows[0]))
+        for row in rows:
+            ws.append(list(row.values()))
+        wb.save(buf)
+    buf.seek(0)
+    return buf
+
+# ───────────────────────────── cases ─────────────────────────────
+
+def bench_overview(ctx):
+    from overview import fetch_participant_summary, fetch_detail_page, count_detail_rows, DETAIL_SORTS
+    gid = ctx["group_id"]
+    sort = next(iter(DETAIL_SORTS))
+    _, second_key = fetch_detail_page(gid, sort)
+    return {
+        "overview.participant_summary": lambda: fetch_participant_summary(gid),
+        "overview.detail_first_page": lambda: fetch_detail_page(gid, sort),
+        "overview.detail_second_page": lambda: fetch_detail_page(gid, sort, after=second_key),
+        "overview.detail_filtered_unpaid": lambda: fetch_detail_page(gid, sort, filters={"paid": "No"}),
+        "overview.count_detail_rows": lambda: count_detail_rows(gid),
+    }
+
+def bench_tracking(ctx):
+    from tracking import fetch_alert_summary, fetch_alert_participants
+    today = datetime.date.today()
+    gid = ctx["group_id"]
+    return {
+        "tracking.unpaid_alert_summary": lambda: fetch_alert_summary("unpaid", today),
+        "tracking.unreceived_alert_summary": lambda: fetch_alert_summary("unreceived", today),
+        "tracking.unpaid_drilldown": lambda: fetch_alert_participants("unpaid", gid, today),
+    }
+
+def bench_ledger(ctx):
+    from group_ledger import load_ledger
+    today = datetime.date.today()
+    gid = ctx["group_id"]
+    ledger = load_ledger(gid)
+    middle = int(ledger.round_numbers[len(ledger.round_numbers) // 2])
+    return {
+        "group_ledger.load": lambda: load_ledger(gid),
+        "group_ledger.unpaid_in_round": lambda: ledger.unpaid_in_round(middle),
+        "group_ledger.overdue": lambda: ledger.overdue(today),
+        "group_ledger.eligible_receivers": lambda: ledger.eligible_receivers(middle),
+        "group_ledger.pack_unpack": lambda: type(ledger).from_packed(ledger.packed()),
+    }
+
+def bench_dashboard(ctx):
+    from dashboard import fetch_dashboard_snapshot
+    return {"dashboard.snapshot": fetch_dashboard_snapshot}
+
+def bench_packing(ctx):
+    from packing import pack_fractions, pack_fractions_optimal
+    rng = np.random.default_rng(0)
+    _, participants, rounds = ctx["shape"]
+    fractions = np.concatenate([_fractions(participants, rounds, rng) for _ in range(ctx["shape"][0])])
+    shuffled = rng.permutation(fractions)
+    start = datetime.date.today()
+    ctx["sizes"]["packing"] = len(fractions)
+    return {
+        "packing.spreadsheet_order": lambda: pack_fractions(fractions, start, "monthly"),
+        "packing.minimise_rounds": lambda: pack_fractions_optimal(shuffled, start, "monthly"),
+    }
+
+def bench_group_insert(ctx):
+    from group_builder import materialize_group
+    from packing import pack_fractions
+    _, participants, rounds = ctx["shape"]
+    start = datetime.date.today()
+    fractions = _fractions(participants, rounds, np.random.default_rng(1))
+    packing = pack_fractions(fractions, start, "monthly")
+    people = [{"name": f"Member {i}", "contact": f"+964 751 {i:07d}", "fraction": f, "contribution": 500 * f}
+              for i, f in enumerate(fractions)]
+    counter = iter(range(10**9))
+    return {
+        "group_builder.materialize_group": lambda: materialize_group(
+            f"{BENCH_PREFIX}insert-{next(counter)}", start, 500, people,
+            packing.round_numbers.tolist(), packing.schedule.tolist(),
+        ),
+    }
+
+def bench_bulk_import(ctx):
+    from bulk_importer import stage_upload, import_groups
+    _, participants, rounds = ctx["shape"]
+    rng = np.random.default_rng(2)
+    counter = iter(range(10**9))
+    uploads = {kind: _bulk_upload(kind, BULK_IMPORT_GROUPS, participants, rounds, rng, kind) for kind in ("csv", "xlsx")}
+    ctx["sizes"]["bulk_import_rows"] = BULK_IMPORT_GROUPS * participants
+
+    def stage(kind):
+        uploads[kind].seek(0)
+        stage_upload(uploads[kind], f"bench.{kind}").discard()
+
+    pending = {}
+
+    def make_upload():
+        # Fresh group names every run, so nothing is skipped as existing.
+        pending["buf"] = _bulk_upload("csv", BULK_IMPORT_GROUPS, participants, rounds, rng, f"import-{next(counter)}")
+
+    def stage_and_import():
+        staged = stage_upload(pending["buf"], "bench.csv")
+        try:
+            results = list(import_groups(staged, "Spreadsheet order"))
+        finally:
+            staged.discard()
+        failed = [r for r in results if r["Status"] != "created"]
+        if failed:
+            raise RuntimeError(f"bulk import failed: {failed[0]['Details']}")
+
+    return {
+        "bulk_importer.stage_csv": lambda: stage("csv"),
+        "bulk_importer.stage_xlsx": lambda: stage("xlsx"),
+        "bulk_importer.stage_and_import_csv": (stage_and_import, make_upload),
+    }
+
+# Each case returns {name: fn} or {name: (fn, untimed per-call setup)}.
+# Read-only cases first; the write cases add (and finally remove) bench groups.
+CASES = {
+    "overview": bench_overview,
+    "tracking": bench_tracking,
+    "ledger": bench_ledger,
+    "dashboard": bench_dashboard,
+    "packing": bench_packing,
+    "group_insert": bench_group_insert,
+    "bulk_import": bench_bulk_import,
+}
+
+# ───────────────────────────── runner ─────────────────────────────
+
+def run_scale(dsn, scale, repeat, only=None, skip_generate=False):
+    from db_handler import get_query_cache
+    groups, participants, rounds = SCALES[scale]
+    entry = {"scale": scale, "groups": groups, "participants_per_group": participants,
+             "rounds": rounds, "contribution_rows": groups * participants * rounds}
+
+    if not skip_generate:
+        _log(f"[{scale}] generating {groups} x {participants} x {rounds}")
+        conn = psycopg2.connect(dsn)
+        try:
+            entry["generated"] = generate(conn, groups, participants, rounds, log=_log)
+        finally:
+            conn.close()
+
+    get_query_cache().clear()
+    ctx = {"shape": (groups, participants, rounds), "group_id": _largest_group_id(), "sizes": {}}
+    results = {}
+    try:
+        for case, build in CASES.items():
+            if only and case not in only:
+                continue
+            for name, fn in build(ctx).items():
+                _log(f"[{scale}] {name}")
+                fn, prepare = fn if isinstance(fn, tuple) else (fn, None)
+
+                def setup(prepare=prepare):
+                    get_query_cache().clear()
+                    if prepare:
+                        prepare()
+
+                results[name] = _timed(fn, repeat, setup=setup)
+    finally:
+        _delete_bench_groups()
+    entry["sizes"] = ctx["sizes"]
+    entry["results"] = results
+    return entry
+
+def _git_commit():
+    try:
+        head = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True, text=True)
+        return head.stdout.strip() + ("-dirty" if dirty.stdout.strip() else "")
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark Quraa's data functions on a synthetic dataset.")
+    parser.add_argument("--dsn", default=None, help="PostgreSQL DSN (default: $QURAA_BENCH_DSN)")
+    parser.add_argument("--scale", nargs="+", choices=list(SCALES), default=["1k", "10k"])
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--only", nargs="+", choices=list(CASES), help="run only these cases")
+    parser.add_argument("--skip-generate", action="store_true", help="reuse the data already in the database")
+    parser.add_argument("--output", default=None, help="write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    dsn = bench_dsn(args.dsn)
+    if not dsn:
+        parser.error("No DSN given (--dsn or $QURAA_BENCH_DSN).")
+    # db_handler builds its pool from $QURAA_DSN when set.
+    os.environ["QURAA_DSN"] = dsn
+
+    conn = psycopg2.connect(dsn)
+    server_version = conn.server_version
+    conn.close()
+
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "postgres": server_version,
+            "repeat": args.repeat,
+        },
+        "scales": [run_scale(dsn, scale, args.repeat, args.only, args.skip_generate) for scale in args.scale],
+    }
+
+    text = json.dumps(report, indent=2, default=str)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+        _log(f"Wrote {args.output}")
+    else:
+        print(text)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,240 @@
+# bulk_importer.py
+"""Streaming importer for multi-group onboarding files, staged in a temporary SQLite file."""
+
+import os
+import sqlite3
+import tempfile
+import weakref
+from dataclasses import dataclass, field
+
+import numpy as np
+import openpyxl
+import pandas as pd
+
+from db_handler import run_query
+from group_builder import materialize_group
+from packing import PACKING_MODES
+
+REQUIRED_COLUMNS = [
+    "Group Name", "Start Date", "Round Duration", "Base Contribution",
+    "Participant Name", "Contact Info", "Share Fraction"
+]
+
+# Rows read from the upload (and written to staging) per chunk.
+CHUNK_ROWS = 5000
+
+# Rows kept for the on-screen preview.
+PREVIEW_ROWS = 50
+
+@dataclass
+class StagedImport:
+    path: str                                   # temporary SQLite staging file
+    groups: pd.DataFrame                        # one row per group: name, rows, first source row
+    preview: pd.DataFrame                       # first PREVIEW_ROWS rows of the file
+    total_rows: int = 0
+    errors: list = field(default_factory=list)  # header-level problems; nothing staged if set
+
+    def __post_init__(self):
+        # Also removes the file when the import is garbage-collected (e.g. an
+        # expired session) or the process exits without discard().
+        self._finalizer = weakref.finalize(self, _remove_file, self.path)
+
+    def discard(self):
+        self._finalizer()
+
+def _remove_file(path):
+    if path and os.path.exists(path):
+        os.remove(path)
+
+def _iter_chunks(uploaded_file, filename):
+    """
+    Yield DataFrames of at most CHUNK_ROWS rows with stripped column names.
+    """
+    if filename.lower().endswith(".csv"):
+        for chunk in pd.read_csv(uploaded_file, chunksize=CHUNK_ROWS):
+            chunk.columns = chunk.columns.str.strip()
+            yield chunk
+        return
+
+    wb = openpyxl.load_workbook(uploaded_file, read_only=True, data_only=True)
+    try:
+        rows = wb.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [str(c).strip() if c is not None else "" for c in header]
+        buffer = []
+        for row in rows:
+            if row is None or all(v is None for v in row):
+                continue
+            buffer.append(row)
+            if len(buffer) >= CHUNK_ROWS:
+                yield pd.DataFrame(buffer, columns=columns)
+                buffer = []
+        if buffer:
+            yield pd.DataFrame(buffer, columns=columns)
+    finally:
+        wb.close()
+
+def _text(column):
+    """
+    Stripped strings with blanks kept missing (astype(str) would turn
+    them into the literal "nan"/"None").
+    """
+    text = column.astype("string").str.strip()
+    return text.mask(text == "")
+
+def _normalize(chunk):
+    """
+    Coerce a raw chunk to the staging layout (same conversions the
+    single-group upload used: bad dates/fractions become NULL, and so do
+    blank text cells; a blank contact is "" as in manual entry).
+    """
+    out = pd.DataFrame({
+        "group_name": _text(chunk["Group Name"]),
+        "start_date": pd.to_datetime(chunk["Start Date"], errors="coerce").dt.strftime("%Y-%m-%d"),
+        "round_duration": _text(chunk["Round Duration"]),
+        "base_contribution": pd.to_numeric(chunk["Base Contribution"], errors="coerce"),
+        "participant_name": _text(chunk["Participant Name"]),
+        "contact": _text(chunk["Contact Info"]).fillna(""),
+        "share_fraction": pd.to_numeric(chunk["Share Fraction"], errors="coerce"),
+    })
+    return out.astype(object).where(out.notna(), None)
+
+def stage_upload(uploaded_file, filename):
+    """
+    Stream the upload into a temporary SQLite staging table and summarize
+    it per group. Only one chunk of the file is held in memory at a time.
+    """
+    fd, path = tempfile.mkstemp(prefix="quraa_import_", suffix=".sqlite")
+    os.close(fd)
+    staged = StagedImport(path=path, groups=pd.DataFrame(), preview=pd.DataFrame())
+
+    db = sqlite3.connect(path)
+    try:
+        db.execute("""
+            CREATE TABLE staged_rows (
+                source_row INTEGER PRIMARY KEY,
+                group_name TEXT, start_date TEXT, round_duration TEXT, base_contribution REAL,
+                participant_name TEXT, contact TEXT, share_fraction REAL
+            )
+        """)
+        source_row = 2  # row 1 is the header
+        for chunk in _iter_chunks(uploaded_file, filename):
+            missing = [c for c in REQUIRED_COLUMNS if c not in chunk.columns]
+            if missing:
+                staged.errors.append(f"Missing required columns: {', '.join(missing)}")
+                break
+            if len(staged.preview) < PREVIEW_ROWS:
+                staged.preview = pd.concat([staged.preview, chunk.head(PREVIEW_ROWS - len(staged.preview))])
+
+            norm = _normalize(chunk)
+            db.executemany(
+                "INSERT INTO staged_rows VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                zip(range(source_row, source_row + len(norm)), *(norm[c] for c in norm.columns)),
+            )
+            source_row += len(norm)
+            staged.total_rows += len(norm)
+        db.commit()
+
+        if not staged.errors:
+            db.execute("CREATE INDEX staged_rows_group ON staged_rows (group_name, source_row)")
+            staged.groups = pd.read_sql_query(
+                """
+                SELECT group_name AS "Group Name",
+                       COUNT(*) AS "Participants",
+                       MIN(source_row) AS "First Row"
+                  FROM staged_rows
+                 GROUP BY group_name
+                 ORDER BY MIN(source_row)
+                """,
+                db,
+            )
+    finally:
+        db.close()
+
+    if staged.errors:
+        staged.discard()
+    return staged
+
+def _row_list(source_rows, limit=10):
+    shown = ", ".join(map(str, source_rows[:limit]))
+    return shown + (f" and {len(source_rows) - limit} more" if len(source_rows) > limit else "")
+
+def _import_one(db, group_name, scheduler):
+    rows = db.execute(
+        """
+        SELECT source_row, start_date, round_duration, base_contribution,
+               participant_name, contact, share_fraction
+          FROM staged_rows
+         WHERE group_name = ?
+         ORDER BY source_row
+        """,
+        (group_name,),
+    ).fetchall()
+
+    blank = [r[0] for r in rows if r[4] is None or r[6] is None]
+    if blank:
+        return "failed", f"Missing Participant Name or Share Fraction in row(s) {_row_list(blank)}.", 0
+
+    first_row, start_date, round_duration, base_contribution = rows[0][:4]
+    if start_date is None:
+        return "failed", f"Invalid Start Date in row {first_row}.", 0
+    if base_contribution is None:
+        return "failed", f"Invalid Base Contribution in row {first_row}.", 0
+
+    fractions = np.array([r[6] for r in rows], dtype=float)
+    packing = PACKING_MODES[scheduler](fractions, start_date, round_duration)
+    if not packing.ok:
+        messages = [
+            (f"Row {rows[e['row']][0]}: " if e["row"] is not None else "") + e["message"]
+            for e in packing.errors
+        ]
+        return "failed", " ".join(messages), 0
+
+    participants = [
+        {"name": r[4], "contact": r[5], "fraction": r[6], "contribution": r[6] * base_contribution}
+        for r in rows
+    ]
+    materialize_group(
+        group_name,
+        start_date,
+        base_contribution,
+        participants,
+        packing.round_numbers.tolist(),
+        packing.schedule.tolist(),
+    )
+    return "created", f"{len(rows)} participants in {packing.total_rounds} rounds.", packing.total_rounds
+
+def import_groups(staged, scheduler):
+    """
+    Create every staged group, one transaction per group. Yields one
+    result dict per group as soon as it is done:
+      {"Group Name", "Status" (created/skipped/failed), "Details", "Rounds"}
+    A failing group never affects the others.
+    """
+    names = [None if pd.isna(n) else n for n in staged.groups["Group Name"]]
+    existing = {row["group_name"] for row in run_query(
+        "SELECT group_name FROM groups WHERE group_name = ANY(%s)", ([n for n in names if n is not None],)
+    )}
+
+    db = sqlite3.connect(staged.path)
+    try:
+        for name in names:
+            if name is None:
+                orphans = [r[0] for r in db.execute(
+                    "SELECT source_row FROM staged_rows WHERE group_name IS NULL ORDER BY source_row"
+                )]
+                yield {"Group Name": "(missing)", "Status": "failed",
+                       "Details": f"Missing Group Name in row(s) {_row_list(orphans)}.", "Rounds": 0}
+                continue
+            if name in existing:
+                yield {"Group Name": name, "Status": "skipped", "Details": "Group already exists.", "Rounds": 0}
+                continue
+            try:
+                status, details, rounds = _import_one(db, name, scheduler)
+            except Exception as e:
+                status, details, rounds = "failed", f"Database error: {e}", 0
+            yield {"Group Name": name, "Status": status, "Details": details, "Rounds": rounds}
+    finally:
+        db.close()
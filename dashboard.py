@@ -0,0 +1,92 @@
+# dashboard.py
+
+from dataclasses import dataclass
+
+import pandas as pd
+
+from db_handler import run_query
+
+# The snapshot reads five tables and is invalidated by writes to any of them;
+# the TTL only bounds staleness of "upcoming" (which moves with CURRENT_DATE).
+DASHBOARD_TTL = 60.0
+
+# Every dashboard metric in one statement => one Neon round trip per render.
+# Scalar counts come back as columns, chart series as JSON arrays.
+DASHBOARD_SQL = """
+WITH contrib AS (
+    SELECT COUNT(*) FILTER (WHERE paid_yesno='Yes') AS paid,
+           COUNT(*) FILTER (WHERE paid_yesno='No')  AS unpaid
+      FROM contributions
+),
+recv AS (
+    SELECT COUNT(*) FILTER (WHERE received_yesno='Yes') AS received,
+           COUNT(*) FILTER (WHERE received_yesno='No')  AS not_received
+      FROM receivables
+),
+group_sizes AS (
+    SELECT g.group_name, COUNT(p.participant_id) AS participant_count
+      FROM groups g
+      LEFT JOIN participants p ON g.group_id = p.group_id
+     GROUP BY g.group_name
+),
+round_status AS (
+    SELECT c.round_number,
+           COUNT(*) FILTER (WHERE c.paid_yesno='Yes') AS paid,
+           COUNT(*) FILTER (WHERE c.paid_yesno='No')  AS unpaid
+      FROM contributions c
+     GROUP BY c.round_number
+),
+upcoming AS (
+    SELECT g.group_name, r.round_number, r.round_date
+      FROM rounds r
+      JOIN groups g ON r.group_id = g.group_id
+     WHERE r.round_date >= CURRENT_DATE
+)
+SELECT (SELECT COUNT(*) FROM groups)       AS total_groups,
+       (SELECT COUNT(*) FROM participants) AS total_participants,
+       contrib.paid,
+       contrib.unpaid,
+       recv.received,
+       recv.not_received,
+       (SELECT COALESCE(json_agg(json_build_array(group_name, participant_count)), '[]'::json)
+          FROM group_sizes) AS group_sizes,
+       (SELECT COALESCE(json_agg(json_build_array(round_number, paid, unpaid) ORDER BY round_number), '[]'::json)
+          FROM round_status) AS round_status,
+       (SELECT COALESCE(json_agg(json_build_array(group_name, round_number, round_date) ORDER BY round_date), '[]'::json)
+          FROM upcoming) AS upcoming
+  FROM contrib, recv
+"""
+
+@dataclass(frozen=True)
+class DashboardSnapshot:
+    total_groups: int
+    total_participants: int
+    paid_contributions: int
+    unpaid_contributions: int
+    received: int
+    not_received: int
+    participants_per_group: pd.DataFrame  # Group Name, Participants
+    round_contributions: pd.DataFrame     # Round, Paid, Unpaid
+    upcoming_rounds: pd.DataFrame         # Group, Round, Round Date
+
+    @classmethod
+    def from_row(cls, row):
+        upcoming = pd.DataFrame(row["upcoming"], columns=["Group", "Round", "Round Date"])
+        upcoming["Round Date"] = pd.to_datetime(upcoming["Round Date"])
+        return cls(
+            total_groups=int(row["total_groups"]),
+            total_participants=int(row["total_participants"]),
+            paid_contributions=int(row["paid"]),
+            unpaid_contributions=int(row["unpaid"]),
+            received=int(row["received"]),
+            not_received=int(row["not_received"]),
+            participants_per_group=pd.DataFrame(row["group_sizes"], columns=["Group Name", "Participants"]),
+            round_contributions=pd.DataFrame(row["round_status"], columns=["Round", "Paid", "Unpaid"]),
+            upcoming_rounds=upcoming,
+        )
+
+def fetch_dashboard_snapshot():
+    """
+    All metrics behind visualization() from a single (cached) statement.
+    """
+    return DashboardSnapshot.from_row(run_query(DASHBOARD_SQL, ttl=DASHBOARD_TTL)[0])
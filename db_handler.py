@@ -1,45 +1,766 @@
 # db_handler.py
 
+import functools
+import os
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
 import psycopg2
+import psycopg2.errors
+from psycopg2 import pool as pg_pool
+from psycopg2 import extensions as pg_ext
 from psycopg2.extras import RealDictCursor
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+# Pool defaults, overridable via st.secrets["neon"] (pool_min, pool_max,
+# pool_timeout, health_check_interval).
+DEFAULT_POOL_MIN = 1
+DEFAULT_POOL_MAX = 10
+DEFAULT_POOL_TIMEOUT = 30.0          # seconds to wait for a free connection
+DEFAULT_HEALTH_CHECK_INTERVAL = 60.0  # ping connections idle longer than this
+
+# Threads used by run_queries() to run independent reads concurrently
+# (each one checks out its own pooled connection).
+QUERY_WORKERS = 4
+
+# Query-result cache bounds (see run_query(..., ttl=...)).
+QUERY_CACHE_MAX_ENTRIES = 256
+DEFAULT_CACHE_TTL = 300.0  # seconds
+
+# Rows per fetchmany() batch when building DataFrames (run_query_df).
+DEFAULT_FETCH_ROWS = 5000
+
+# Rows per FETCH from a server-side cursor (iter_query).
+DEFAULT_ITERSIZE = 2000
+
+# Statements slower than this go to the slow-query log (override: neon.slow_query_ms).
+DEFAULT_SLOW_QUERY_MS = 500.0
+RERUN_HISTORY = 500    # reruns kept for the Performance page
+SLOW_LOG_SIZE = 200    # slow statements kept
+
+# Table names referenced by a statement (FROM/JOIN for reads, INTO/UPDATE/DELETE FROM for writes).
+_TABLE_RE = re.compile(r"\b(?:FROM|JOIN|INTO|UPDATE)\s+([A-Za-z_][\w.]*)\b(?!\s*\()", re.IGNORECASE)
+
+def tables_in(sql):
+    """
+    Lower-cased table names a statement reads from or writes to.
+    """
+    return frozenset(name.split(".")[-1].lower() for name in _TABLE_RE.findall(sql))
+
+def escape_like(text):
+    """
+    Escape LIKE/ILIKE wildcards (and the backslash escape itself) so `text`
+    matches literally, e.g. in a "starts with" filter: escape_like(s) + "%".
+    """
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+_LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_SPACE_RE = re.compile(r"\s+")
+
+def normalize_sql(sql):
+    """
+    Collapse whitespace and replace inline literals with '?', so the same
+    statement with different values groups together in the slow log.
+    """
+    if isinstance(sql, bytes):
+        sql = sql.decode("utf-8", "replace")
+    sql = _LITERAL_RE.sub("?", str(sql))
+    sql = _SPACE_RE.sub(" ", sql).strip()
+    return sql[:2000]
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100.0
+    lo, hi = int(k), min(int(k) + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+class QueryStats:
+    """
+    Per-rerun query instrumentation: statement count, latencies, rows,
+    connection acquisition time and cache hits, attributed to the page the
+    rerun rendered, plus a log of statements over the slow threshold.
+    """
+
+    def __init__(self, slow_query_ms=DEFAULT_SLOW_QUERY_MS):
+        self.slow_query_ms = slow_query_ms
+        self._lock = threading.Lock()
+        self._reruns = deque(maxlen=RERUN_HISTORY)
+        self._current = {}  # session id -> rerun record being filled
+        self._slow = deque(maxlen=SLOW_LOG_SIZE)
+
+    def _new_record(self, session, page):
+        record = {
+            "session": session, "page": page, "started": time.time(),
+            "latencies_ms": [], "rows": 0, "acquire_ms": [], "cache_hits": 0,
+        }
+        self._current[session] = record
+        self._reruns.append(record)
+        if len(self._current) > RERUN_HISTORY:
+            # Forget sessions whose last rerun already fell out of the history
+            alive = {id(r) for r in self._reruns}
+            self._current = {s: r for s, r in self._current.items() if id(r) in alive}
+        return record
+
+    def _record_for(self, session):
+        record = self._current.get(session)
+        return record if record is not None else self._new_record(session, "(background)")
+
+    def begin_rerun(self, session, page=None):
+        with self._lock:
+            self._new_record(session, page or "(no page)")
+
+    def begin_fragment_run(self, session):
+        """
+        New record for a fragment-only rerun, tagged with the page of the
+        session's last full rerun so the two are summarised separately.
+        """
+        with self._lock:
+            previous = self._current.get(session)
+            page = previous["page"].removesuffix(" (fragment)") if previous else "(no page)"
+            self._new_record(session, f"{page} (fragment)")
+
+    def set_page(self, session, page):
+        with self._lock:
+            self._record_for(session)["page"] = page
+
+    def record_query(self, session, sql, seconds, rows):
+        ms = 1000.0 * seconds
+        with self._lock:
+            record = self._record_for(session)
+            record["latencies_ms"].append(ms)
+            record["rows"] += max(rows or 0, 0)
+            if ms >= self.slow_query_ms:
+                self._slow.append({
+                    "at": time.strftime("%Y-%m-%d %H:%M:%S"),
+                    "page": record["page"],
+                    "ms": round(ms, 1),
+                    "rows": rows,
+                    "sql": normalize_sql(sql),
+                })
+
+    def record_acquire(self, session, seconds):
+        with self._lock:
+            self._record_for(session)["acquire_ms"].append(1000.0 * seconds)
+
+    def record_cache_hit(self, session):
+        with self._lock:
+            self._record_for(session)["cache_hits"] += 1
+
+    def page_summary(self):
+        """
+        One dict per page over the retained reruns.
+        """
+        with self._lock:
+            reruns = [dict(r, latencies_ms=list(r["latencies_ms"]), acquire_ms=list(r["acquire_ms"])) for r in self._reruns]
+        pages = {}
+        for r in reruns:
+            pages.setdefault(r["page"], []).append(r)
+        summary = []
+        for page, rs in pages.items():
+            latencies = [ms for r in rs for ms in r["latencies_ms"]]
+            acquire = [ms for r in rs for ms in r["acquire_ms"]]
+            counts = [len(r["latencies_ms"]) for r in rs]
+            summary.append({
+                "page": page,
+                "reruns": len(rs),
+                "queries/rerun": round(sum(counts) / len(rs), 2),
+                "max queries": max(counts),
+                "db ms/rerun": round(sum(latencies) / len(rs), 1),
+                "p50 ms": round(_percentile(latencies, 50), 1),
+                "p95 ms": round(_percentile(latencies, 95), 1),
+                "p99 ms": round(_percentile(latencies, 99), 1),
+                "rows/rerun": round(sum(r["rows"] for r in rs) / len(rs), 1),
+                "acquire p95 ms": round(_percentile(acquire, 95), 2),
+                "cache hits/rerun": round(sum(r["cache_hits"] for r in rs) / len(rs), 2),
+            })
+        return sorted(summary, key=lambda row: row["db ms/rerun"], reverse=True)
+
+    def recent_reruns(self, limit=50):
+        with self._lock:
+            reruns = list(self._reruns)[-limit:]
+        return [
+            {
+                "started": time.strftime("%H:%M:%S", time.localtime(r["started"])),
+                "page": r["page"],
+                "queries": len(r["latencies_ms"]),
+                "db ms": round(sum(r["latencies_ms"]), 1),
+                "rows": r["rows"],
+                "acquire ms": round(sum(r["acquire_ms"]), 2),
+                "cache hits": r["cache_hits"],
+            }
+            for r in reversed(reruns)
+        ]
+
+    def slow_queries(self):
+        with self._lock:
+            return list(reversed(self._slow))
+
+    def reset(self):
+        with self._lock:
+            self._reruns.clear()
+            self._current.clear()
+            self._slow.clear()
+
+@st.cache_resource(show_spinner=False)
+def get_query_stats():
+    try:
+        slow_ms = float(st.secrets["neon"].get("slow_query_ms", DEFAULT_SLOW_QUERY_MS))
+    except Exception:
+        slow_ms = DEFAULT_SLOW_QUERY_MS
+    return QueryStats(slow_ms)
+
+def _session_key():
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx is not None else "background"
+
+def begin_rerun(page=None):
+    """
+    Start attributing this session's queries to a new rerun (called once
+    at the top of every script run).
+    """
+    get_query_stats().begin_rerun(_session_key(), page)
+
+def begin_fragment_run():
+    """
+    On a fragment-only rerun (the main script, and so begin_rerun(), does
+    not run) start a record for the fragment's queries instead of adding
+    them to the previous full rerun's; during a full rerun do nothing.
+    Called by stats_fragment.
+    """
+    ctx = get_script_run_ctx()
+    if ctx is not None and ctx.fragment_ids_this_run:
+        get_query_stats().begin_fragment_run(_session_key())
+
+def stats_fragment(func=None, **fragment_kwargs):
+    """
+    Drop-in for st.fragment (bare or with arguments, e.g. run_every) that
+    calls begin_fragment_run() before every run of the fragment, so no
+    fragment can forget to and report into the full rerun's record.
+    """
+    if func is None:
+        return lambda f: stats_fragment(f, **fragment_kwargs)
+
+    @functools.wraps(func)
+    def run(*args, **kwargs):
+        begin_fragment_run()
+        return func(*args, **kwargs)
+
+    return st.fragment(run, **fragment_kwargs)
+
+def set_rerun_page(page):
+    get_query_stats().set_page(_session_key(), page)
+
+class _TimedCursorMixin:
+    """
+    Times every execute() (psycopg2 client-side cursors fetch the whole
+    result inside execute, so this is the full round trip).
+    """
+
+    def execute(self, query, vars=None):
+        started = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        finally:
+            get_query_stats().record_query(_session_key(), query, time.perf_counter() - started, self.rowcount)
+
+class TimedCursor(_TimedCursorMixin, pg_ext.cursor):
+    pass
+
+class TimedRealDictCursor(_TimedCursorMixin, RealDictCursor):
+    pass
+
+class ConnectionPool:
+    """
+    Process-wide pool of Neon connections shared by every Streamlit session.
+    Wraps psycopg2's ThreadedConnectionPool, but blocks (up to `timeout`)
+    instead of raising when all connections are checked out, and replaces
+    connections whose socket went stale while idle.
+    """
+
+    def __init__(self, dsn, minconn=DEFAULT_POOL_MIN, maxconn=DEFAULT_POOL_MAX,
+                 timeout=DEFAULT_POOL_TIMEOUT, health_check_interval=DEFAULT_HEALTH_CHECK_INTERVAL):
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+
+        self._pool = pg_pool.ThreadedConnectionPool(minconn, maxconn, dsn)
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._lock = threading.Lock()
+        self._last_used = {}  # id(conn) -> monotonic time it was returned
+        self._stats = {
+            "checkouts": 0,
+            "checkins": 0,
+            "in_use": 0,
+            "peak_in_use": 0,
+            "reconnects": 0,
+            "discarded": 0,
+            "timeouts": 0,
+            "wait_time_total": 0.0,
+        }
+
+    def getconn(self):
+        started = time.monotonic()
+        if not self._slots.acquire(timeout=self.timeout):
+            with self._lock:
+                self._stats["timeouts"] += 1
+            raise pg_pool.PoolError(
+                f"Timed out after {self.timeout}s waiting for a database connection "
+                f"(pool max = {self.maxconn})."
+            )
+        try:
+            conn = self._pool.getconn()
+            if not self._is_healthy(conn):
+                self._pool.putconn(conn, close=True)
+                conn = self._pool.getconn()
+                with self._lock:
+                    self._stats["reconnects"] += 1
+        except Exception:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self._stats["checkouts"] += 1
+            self._stats["in_use"] += 1
+            self._stats["peak_in_use"] = max(self._stats["peak_in_use"], self._stats["in_use"])
+            self._stats["wait_time_total"] += time.monotonic() - started
+        return conn
+
+    def putconn(self, conn, discard=False):
+        close = discard or bool(conn.closed)
+        if not close and conn.get_transaction_status() != pg_ext.TRANSACTION_STATUS_IDLE:
+            # Never hand out a connection with a half-finished transaction.
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                close = True
+
+        with self._lock:
+            if close:
+                self._last_used.pop(id(conn), None)
+                self._stats["discarded"] += 1
+            else:
+                self._last_used[id(conn)] = time.monotonic()
+            self._stats["checkins"] += 1
+            self._stats["in_use"] -= 1
+        try:
+            self._pool.putconn(conn, close=close)
+        finally:
+            self._slots.release()
+
+    def _is_healthy(self, conn):
+        if conn.closed:
+            return False
+        with self._lock:
+            last_used = self._last_used.get(id(conn))
+        if last_used is not None and time.monotonic() - last_used < self.health_check_interval:
+            return True
+        # Idle long enough for Neon to have dropped it: ping before use
+        # (plain cursor, so pings don't count as the rerun's queries).
+        try:
+            with conn.cursor(cursor_factory=pg_ext.cursor) as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
 
-def get_connection():
-    conn = psycopg2.connect(st.secrets["neon"]["dsn"])
-    return conn
+    def stats(self):
+        with self._lock:
+            snapshot = dict(self._stats)
+        snapshot["min_size"] = self.minconn
+        snapshot["max_size"] = self.maxconn
+        snapshot["open"] = len(self._pool._used) + len(self._pool._pool)
+        snapshot["idle"] = len(self._pool._pool)
+        snapshot["avg_wait_ms"] = (
+            1000.0 * snapshot["wait_time_total"] / snapshot["checkouts"] if snapshot["checkouts"] else 0.0
+        )
+        return snapshot
 
-def run_query(sql, params=None):
+    def closeall(self):
+        self._pool.closeall()
+
+class QueryCache:
+    """
+    LRU + TTL cache of SELECT results keyed by (sql, params).
+    Every entry remembers the generation of each table it read; writes bump
+    a table's generation, which silently invalidates just the entries that
+    depend on it.
+    """
+
+    def __init__(self, max_entries=QUERY_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (rows, expires_at, {table: generation})
+        self._generations = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "expired": 0, "invalidated": 0, "evictions": 0, "table_bumps": 0}
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            rows, expires_at, deps = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[key]
+                self._stats["expired"] += 1
+                self._stats["misses"] += 1
+                return None
+            if any(self._generations.get(t, 0) != gen for t, gen in deps.items()):
+                del self._entries[key]
+                self._stats["invalidated"] += 1
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return rows
+
+    def snapshot_generations(self, tables):
+        """
+        Taken BEFORE running the query, so a write that lands while it runs
+        makes the stored entry stale instead of caching pre-write rows forever.
+        """
+        with self._lock:
+            return {t: self._generations.get(t, 0) for t in tables}
+
+    def put(self, key, rows, ttl, deps):
+        with self._lock:
+            self._entries[key] = (rows, time.monotonic() + ttl, deps)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def bump(self, tables):
+        with self._lock:
+            for t in tables:
+                self._generations[t] = self._generations.get(t, 0) + 1
+                self._stats["table_bumps"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot["entries"] = len(self._entries)
+        lookups = snapshot["hits"] + snapshot["misses"]
+        snapshot["hit_rate"] = snapshot["hits"] / lookups if lookups else 0.0
+        return snapshot
+
+@st.cache_resource(show_spinner=False)
+def get_query_cache():
+    return QueryCache()
+
+def cache_stats():
+    """
+    Hit/miss/invalidation counters of the query-result cache.
+    """
+    return get_query_cache().stats()
+
+def invalidate_tables(*tables):
+    """
+    Mark cached results that read any of `tables` as stale. run_command and
+    run_command_returning do this automatically; code writing through
+    get_connection() directly must call it after committing.
+    """
+    get_query_cache().bump(t.lower() for t in tables)
+
+def _neon_settings():
+    """
+    st.secrets["neon"], unless $QURAA_DSN is set (scripts and benchmarks
+    pointed at a local database without a secrets.toml).
+    """
+    dsn = os.environ.get("QURAA_DSN")
+    if dsn:
+        return {"dsn": dsn}
+    return st.secrets["neon"]
+
+@st.cache_resource(show_spinner=False)
+def get_pool():
+    """
+    Create the connection pool once per process (cached across reruns and sessions).
+    """
+    neon = _neon_settings()
+    return ConnectionPool(
+        neon["dsn"],
+        minconn=int(neon.get("pool_min", DEFAULT_POOL_MIN)),
+        maxconn=int(neon.get("pool_max", DEFAULT_POOL_MAX)),
+        timeout=float(neon.get("pool_timeout", DEFAULT_POOL_TIMEOUT)),
+        health_check_interval=float(neon.get("health_check_interval", DEFAULT_HEALTH_CHECK_INTERVAL)),
+    )
+
+def pool_stats():
+    """
+    Checkout counters and sizing info for the shared pool.
+    """
+    return get_pool().stats()
+
+def _connection_lost(exc, conn=None):
+    """
+    True when `exc` means the connection itself is gone, so it should be
+    discarded and a read retried once. Errors the server reported on a
+    working connection, such as a statement_timeout (QueryCanceled is an
+    OperationalError too), are not.
+    """
+    if isinstance(exc, psycopg2.errors.QueryCanceled):
+        return False
+    if not isinstance(exc, (psycopg2.OperationalError, psycopg2.InterfaceError)):
+        return False
+    if conn is None and getattr(exc, "cursor", None) is not None:
+        conn = exc.cursor.connection
+    return exc.pgcode is None or bool(conn is not None and conn.closed)
+
+@contextmanager
+def get_connection(autocommit=False):
+    """
+    Check a connection out of the pool for the duration of a `with` block.
+    Commits on a clean exit, rolls back on error, and always checks the
+    connection back in (dropping it if the socket is broken).
+    Reads pass autocommit=True so they don't pay for a COMMIT round trip.
+    """
+    pool = get_pool()
+    started = time.perf_counter()
+    conn = pool.getconn()
+    get_query_stats().record_acquire(_session_key(), time.perf_counter() - started)
+    discard = False
+    try:
+        conn.autocommit = autocommit
+        conn.cursor_factory = TimedCursor  # every statement is instrumented
+        yield conn
+        conn.commit()
+    except Exception as e:
+        discard = _connection_lost(e, conn)
+        if not discard and not conn.closed:
+            conn.rollback()
+        raise
+    finally:
+        pool.putconn(conn, discard=discard)
+
+def _hashable(value):
+    if isinstance(value, (list, tuple)):
+        return tuple(_hashable(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _hashable(v)) for k, v in value.items()))
+    return value
+
+def _fetch(sql, params):
+    # Retries once on a fresh connection if the pooled one turned out to be dead.
+    for attempt in range(2):
+        try:
+            with get_connection(autocommit=True) as conn:
+                with conn.cursor(cursor_factory=TimedRealDictCursor) as cur:  # Use dictionary cursor
+                    cur.execute(sql, params or ())
+                    return cur.fetchall()
+        except (psycopg2.OperationalError, psycopg2.InterfaceError) as e:
+            if attempt or not _connection_lost(e):
+                raise
+
+def run_query(sql, params=None, ttl=None):
     """
     For SELECT statements (returns rows as dictionaries).
+    Pass ttl (seconds) to serve repeat calls from the query-result cache;
+    the entry is dropped early when any table it reads is written to.
     """
-    conn = get_connection()
-    cur = conn.cursor(cursor_factory=RealDictCursor)  # Use dictionary cursor
-    cur.execute(sql, params or ())
-    rows = cur.fetchall()
-    cur.close()
-    conn.close()
-    return rows
+    if ttl is None:
+        return _fetch(sql, params)
+    return cached_result((sql, _hashable(params)), tables_in(sql), lambda: _fetch(sql, params), ttl)
+
+def cached_result(key, tables, fetch, ttl):
+    """
+    Serve fetch() from the query-result cache under `key`, dropped after
+    `ttl` seconds or as soon as any of `tables` is written to. For results
+    built from several statements (e.g. group_ledger.load_ledger).
+    """
+    cache = get_query_cache()
+    result = cache.get(key)
+    if result is not None:
+        get_query_stats().record_cache_hit(_session_key())
+    else:
+        deps = cache.snapshot_generations(tables)
+        result = fetch()
+        cache.put(key, result, ttl, deps)
+    return result
+
+# PostgreSQL type OIDs => how run_query_df builds the column.
+_PG_INTS = {20, 21, 23, 26}          # int8, int2, int4, oid
+_PG_FLOATS = {700, 701, 1700}        # float4, float8, numeric
+_PG_DATES = {1082, 1114}             # date, timestamp
+_PG_TIMESTAMPTZ = 1184
+_PG_BOOL = 16
+
+_YES_NO = ("No", "Yes")
+
+def _column_chunk(values, type_code):
+    """
+    One batch of a column as a typed pandas Series.
+    """
+    import pandas as pd
+
+    if type_code in _PG_INTS:
+        return pd.Series(values, dtype="Int64")
+    if type_code in _PG_FLOATS:
+        return pd.Series([None if v is None else float(v) for v in values], dtype="float64")
+    if type_code in _PG_DATES:
+        return pd.Series(pd.to_datetime(list(values)), dtype="datetime64[ns]")
+    if type_code == _PG_TIMESTAMPTZ:
+        return pd.Series(pd.to_datetime(list(values), utc=True))
+    if type_code == _PG_BOOL:
+        return pd.Series(values, dtype="boolean")
+    if all(v is None or v in _YES_NO for v in values):
+        return pd.Series(pd.Categorical(values, categories=_YES_NO))
+    return pd.Series(values, dtype=object)
+
+def _concat_column(chunks, type_code):
+    import pandas as pd
+
+    if not chunks:
+        return _column_chunk([], type_code)
+    if len({str(c.dtype) for c in chunks}) > 1:
+        # A text column that was 'Yes'/'No' in some batches only
+        chunks = [c.astype(object) for c in chunks]
+    column = pd.concat(chunks, ignore_index=True) if len(chunks) > 1 else chunks[0]
+    if str(column.dtype) == "Int64" and not column.hasnans:
+        column = column.astype("int64")
+    return column
+
+def _fetch_frame(sql, params, batch_rows):
+    import pandas as pd
+
+    for attempt in range(2):
+        try:
+            with get_connection(autocommit=True) as conn:
+                with conn.cursor() as cur:  # tuple cursor: no dict per row
+                    cur.execute(sql, params or ())
+                    names = [d.name for d in cur.description]
+                    types = [d.type_code for d in cur.description]
+                    chunks = [[] for _ in names]
+                    while True:
+                        batch = cur.fetchmany(batch_rows)
+                        if not batch:
+                            break
+                        for i, values in enumerate(zip(*batch)):
+                            chunks[i].append(_column_chunk(list(values), types[i]))
+            return pd.DataFrame({name: _concat_column(c, t) for name, c, t in zip(names, chunks, types)})
+        except (psycopg2.OperationalError, psycopg2.InterfaceError) as e:
+            if attempt or not _connection_lost(e):
+                raise
+
+def run_query_df(sql, params=None, columns=None, ttl=None, batch_rows=DEFAULT_FETCH_ROWS):
+    """
+    For SELECT statements, returned as a typed pandas DataFrame built
+    column by column from tuple batches (no dict per row):
+      - integers => int64 (Int64 when NULLs are present)
+      - numeric/float => float64, date/timestamp => datetime64
+      - text columns holding only 'Yes'/'No' => category ['No', 'Yes']
+    columns renames the result positionally. ttl behaves as in run_query;
+    cached frames are shared between sessions, so treat them as read-only.
+    """
+    if ttl is None:
+        df = _fetch_frame(sql, params, batch_rows)
+    else:
+        key = ("frame", sql, _hashable(params))
+        df = cached_result(key, tables_in(sql), lambda: _fetch_frame(sql, params, batch_rows), ttl).copy(deep=False)
+    if columns is not None:
+        df.columns = columns
+    return df
+
+def iter_query(sql, params=None, itersize=DEFAULT_ITERSIZE, batches=False, dict_rows=False):
+    """
+    Stream a SELECT through a named (server-side) cursor instead of
+    fetchall(): the server keeps the result set and rows arrive `itersize`
+    at a time, so memory stays bounded by one batch.
+
+    Yields rows (tuples, or dicts with dict_rows=True), or lists of up to
+    `itersize` rows with batches=True. The generator holds one pooled
+    connection and an open transaction until it is exhausted or closed
+    (break out of a for loop, call .close(), or let it be garbage
+    collected); the connection then goes straight back to the pool.
+    Not cached: use it for scans too large to keep anyway.
+    """
+    cursor_factory = TimedRealDictCursor if dict_rows else TimedCursor
+    # Named cursors only live inside a transaction, so no autocommit here.
+    with get_connection() as conn:
+        with conn.cursor(name=f"quraa_iter_{uuid.uuid4().hex}", cursor_factory=cursor_factory) as cur:
+            cur.itersize = itersize
+            cur.execute(sql, params or ())
+            while True:
+                rows = cur.fetchmany(itersize)
+                if not rows:
+                    break
+                if batches:
+                    yield rows
+                else:
+                    yield from rows
 
 def run_command(sql, params=None):
     """
     For non-returning commands like UPDATE/DELETE.
     """
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute(sql, params or ())
-    conn.commit()
-    cur.close()
-    conn.close()
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(sql, params or ())
+    invalidate_tables(*tables_in(sql))
 
 def run_command_returning(sql, params=None):
     """
     For INSERT ... RETURNING.
     """
-    conn = get_connection()
-    cur = conn.cursor(cursor_factory=RealDictCursor)  # Use dictionary cursor here too
-    cur.execute(sql, params or ())
-    rows = cur.fetchall()
-    conn.commit()
-    cur.close()
-    conn.close()
+    with get_connection() as conn:
+        with conn.cursor(cursor_factory=TimedRealDictCursor) as cur:  # Use dictionary cursor here too
+            cur.execute(sql, params or ())
+            rows = cur.fetchall()
+    invalidate_tables(*tables_in(sql))
     return rows
+
+@st.cache_resource(show_spinner=False)
+def _query_executor():
+    return ThreadPoolExecutor(max_workers=QUERY_WORKERS, thread_name_prefix="quraa-query")
+
+def run_queries(queries, ttl=None, as_frame=False):
+    """
+    Run a batch of independent SELECTs concurrently and return all results.
+
+    queries: {name: (sql, params)}  ->  {name: rows}
+    (or {name: DataFrame} with as_frame=True, fetched via run_query_df)
+
+    Each query runs on a worker thread with its own pooled connection, so
+    page latency is roughly the slowest query instead of the sum of all
+    round trips. ttl behaves as in run_query (cache hits never touch the
+    pool). The first error is re-raised after every query has finished.
+    """
+    fetch = run_query_df if as_frame else run_query
+    if len(queries) <= 1:
+        return {name: fetch(sql, params, ttl=ttl) for name, (sql, params) in queries.items()}
+
+    # Resolve the shared resources here so worker threads never initialize them
+    get_pool()
+    get_query_cache()
+    ctx = get_script_run_ctx()
+
+    def task(sql, params):
+        if ctx is not None:
+            add_script_run_ctx(threading.current_thread(), ctx)
+        return fetch(sql, params, ttl=ttl)
+
+    executor = _query_executor()
+    futures = {name: executor.submit(task, sql, params) for name, (sql, params) in queries.items()}
+    results, error = {}, None
+    for name, future in futures.items():
+        try:
+            results[name] = future.result()
+        except Exception as e:
+            error = error or e
+    if error is not None:
+        raise error
+    return results
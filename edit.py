@@ -1,5 +1,5 @@
 import streamlit as st
-from db_handler import run_query, run_command
+from db_handler import run_query, run_command, DEFAULT_CACHE_TTL
 
 def edit():
     """
@@ -27,7 +27,7 @@ def edit():
     if option == "Edit Group Name":
         # Fetch group_id + group_name from DB
         sql_groups = "SELECT group_id, group_name FROM groups ORDER BY group_name"
-        group_rows = run_query(sql_groups)
+        group_rows = run_query(sql_groups, ttl=DEFAULT_CACHE_TTL)
 
         if not group_rows:
             st.info("No group data available to edit.")
@@ -67,7 +67,7 @@ def edit():
           FROM participants
           ORDER BY participant_name
         """
-        part_rows = run_query(sql_part)
+        part_rows = run_query(sql_part, ttl=DEFAULT_CACHE_TTL)
 
         if not part_rows:
             st.info("No participant data available to edit.")
@@ -123,7 +123,7 @@ def edit():
         )
 
         sql_groups = "SELECT group_id, group_name FROM groups ORDER BY group_name"
-        group_rows = run_query(sql_groups)
+        group_rows = run_query(sql_groups, ttl=DEFAULT_CACHE_TTL)
         if not group_rows:
             st.info("No group data available for deletion.")
             return
@@ -0,0 +1,58 @@
+import streamlit as st
+from db_handler import run_query, DEFAULT_CACHE_TTL
+from ledger_export import EXPORT_FORMATS, start_export, write_ledger
+
+def export():
+    """
+    Download the full contributions/receivables ledger for selected groups
+    (or all of them) as CSV, Excel or Parquet. The file is streamed from a
+    server-side cursor into a temporary file, never held as a DataFrame.
+    """
+    st.title("📤 Export Ledger")
+
+    group_rows = run_query("SELECT group_id, group_name FROM groups ORDER BY group_name;", ttl=DEFAULT_CACHE_TTL)
+    if not group_rows:
+        st.warning("No groups found in the database.")
+        return
+
+    name_to_id = {row["group_name"]: row["group_id"] for row in group_rows}
+    selected = st.multiselect("Groups (leave empty for all groups)", list(name_to_id), key="export_groups")
+    fmt = st.radio("Format", list(EXPORT_FORMATS), horizontal=True, key="export_format")
+
+    if not st.button("Prepare export"):
+        return
+
+    try:
+        export_file = start_export(fmt, [name_to_id[name] for name in selected])
+    except Exception as e:
+        st.error(f"Error preparing export: {e}")
+        return
+
+    # The file only lives for this run: st.download_button reads it once
+    # here, so nothing is re-read on later reruns or left behind when the
+    # session ends (or this run is interrupted).
+    try:
+        if not export_file.total_rows:
+            st.info("No ledger rows for this selection.")
+            return
+
+        total = export_file.total_rows
+        progress = st.progress(0.0, text=f"Exporting {total:,} rows...")
+        try:
+            for written in write_ledger(export_file):
+                progress.progress(min(written / total, 1.0), text=f"{written:,} / {total:,} rows")
+        except Exception as e:
+            st.error(f"Error exporting ledger: {e}")
+            return
+        progress.progress(1.0, text=f"{export_file.rows_written:,} rows written")
+
+        with open(export_file.path, "rb") as f:
+            st.download_button(
+                f"Download {export_file.file_name} ({export_file.rows_written:,} rows)",
+                f,
+                file_name=export_file.file_name,
+                mime=export_file.mime,
+            )
+        st.caption("The download link is valid until the next interaction with this page.")
+    finally:
+        export_file.discard()
@@ -1,7 +1,58 @@
 import streamlit as st
-import psycopg2
-from psycopg2.extras import RealDictCursor
+import threading
+import time
 import datetime
+from db_handler import get_connection
+
+# How long a session trusts its cached {name, email, role} before re-reading the role.
+IDENTITY_TTL = 300  # seconds
+
+class _RoleVersions:
+    """
+    Process-wide counter per email, bumped when an admin changes that
+    user's role, so every session holding a cached identity notices.
+    """
+
+    def __init__(self):
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def get(self, email):
+        with self._lock:
+            return self._versions.get(email, 0)
+
+    def bump(self, email):
+        with self._lock:
+            self._versions[email] = self._versions.get(email, 0) + 1
+
+@st.cache_resource(show_spinner=False)
+def _role_versions():
+    return _RoleVersions()
+
+def invalidate_identity(email):
+    """
+    Force sessions of `email` to re-resolve their role on the next rerun.
+    """
+    _role_versions().bump(email)
+
+def _resolve_role(user_email, user_name, default_role):
+    # Optionally auto-assign 'admin' to specific emails (only used on first login)
+    admin_emails = st.secrets.get("admin_emails", [])
+    new_role = "admin" if user_email in admin_emails else default_role
+
+    # One round trip: insert on first login, otherwise return the stored role.
+    # The no-op DO UPDATE makes RETURNING yield the existing row too, even
+    # when a concurrent first login inserted it (needs users_email_key,
+    # migration 3).
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("""
+                INSERT INTO users (username, email, role, created_at)
+                VALUES (%s, %s, %s, %s)
+                ON CONFLICT (email) DO UPDATE SET email = EXCLUDED.email
+                RETURNING role
+            """, (user_name, user_email, new_role, datetime.datetime.now()))
+            return cur.fetchone()[0]
 
 def google_signin():
     # Auto-trigger Google login
@@ -13,30 +64,29 @@ def google_signin():
     user_name = st.experimental_user.name or "Unknown"
     default_role = "participant"  # or "user", depending on your model
 
-    try:
-        # Connect to DB
-        with psycopg2.connect(st.secrets["neon"]["dsn"]) as conn:
-            with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                # Check if user already exists
-                cur.execute("SELECT * FROM users WHERE email = %s", (user_email,))
-                user_record = cur.fetchone()
-
-                if not user_record:
-                    # Optionally auto-assign 'admin' to specific emails
-                    admin_emails = st.secrets.get("admin_emails", [])
-                    role = "admin" if user_email in admin_emails else default_role
-
-                    # Insert new user
-                    cur.execute("""
-                        INSERT INTO users (username, email, role, created_at)
-                        VALUES (%s, %s, %s, %s)
-                    """, (user_name, user_email, role, datetime.datetime.now()))
-                    conn.commit()
-                else:
-                    role = user_record["role"]
+    # Reuse this session's identity unless it expired, belongs to another
+    # account, or an admin changed the role since it was resolved.
+    cached = st.session_state.get("identity")
+    version = _role_versions().get(user_email)
+    if (
+        cached
+        and cached["email"] == user_email
+        and cached["version"] == version
+        and time.monotonic() - cached["resolved_at"] < IDENTITY_TTL
+    ):
+        return cached["user"]
 
+    try:
+        role = _resolve_role(user_email, user_name, default_role)
     except Exception as e:
         st.error("Error connecting to the database or fetching user info.")
         st.stop()
 
-    return {"name": user_name, "email": user_email, "role": role}
+    user = {"name": user_name, "email": user_email, "role": role}
+    st.session_state["identity"] = {
+        "user": user,
+        "email": user_email,
+        "version": version,
+        "resolved_at": time.monotonic(),
+    }
+    return user
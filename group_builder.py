@@ -0,0 +1,106 @@
+# group_builder.py
+
+from psycopg2.extras import execute_values
+from db_handler import get_connection, invalidate_tables
+
+# Rows per multi-row INSERT statement sent by execute_values.
+INSERT_PAGE_SIZE = 1000
+
+def materialize_group(group_name, start_date, base_contribution, participants, assigned_rounds, round_dates):
+    """
+    Write a complete Quraa group in ONE transaction:
+      - groups        (1 row)
+      - participants  (ids drawn from the sequence, then one multi-row INSERT)
+      - rounds        (one row per round, not per participant)
+      - contributions (participants x rounds, generated server-side)
+      - receivables   (one row per participant, in its assigned round)
+
+    participants:    list of dicts with "name", "contact", "fraction" and
+                     optionally "contribution" (stored as NULL when absent)
+    assigned_rounds: round number assigned to each participant (same order)
+    round_dates:     date of round 1..N, so len(round_dates) == total rounds
+
+    Returns {"group_id", "participant_ids", "total_rounds"}. On any error the
+    transaction is rolled back and the exception propagates to the caller.
+    """
+    if len(participants) != len(assigned_rounds):
+        raise ValueError("Every participant needs an assigned round.")
+
+    total_rounds = len(round_dates)
+
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            # 1) groups
+            cur.execute(
+                """
+                INSERT INTO groups (group_name, start_date, total_rounds, monthly_contribution)
+                VALUES (%s, %s, %s, %s)
+                RETURNING group_id
+                """,
+                (group_name, start_date, total_rounds, base_contribution),
+            )
+            group_id = cur.fetchone()[0]
+
+            # 2) participants. The ids are drawn from the sequence first and
+            # inserted explicitly, so each id is paired with its participant
+            # by construction (INSERT ... RETURNING row order is not guaranteed).
+            cur.execute(
+                "SELECT nextval(pg_get_serial_sequence('participants', 'participant_id')) FROM generate_series(1, %s)",
+                (len(participants),),
+            )
+            participant_ids = [row[0] for row in cur.fetchall()]
+            part_rows = [
+                (
+                    pid,
+                    p["name"].strip(),
+                    group_id,
+                    int(rnd),
+                    p.get("contribution"),
+                    float(p["fraction"]),
+                    p["contact"].strip(),
+                )
+                for pid, p, rnd in zip(participant_ids, participants, assigned_rounds)
+            ]
+            execute_values(
+                cur,
+                """
+                INSERT INTO participants (participant_id, participant_name, group_id, participant_order, contribution, share_fraction, participant_contact_info)
+                VALUES %s
+                """,
+                part_rows,
+                page_size=INSERT_PAGE_SIZE,
+            )
+
+            # 3) rounds
+            execute_values(
+                cur,
+                "INSERT INTO rounds (group_id, round_number, round_date, round_status) VALUES %s",
+                [(group_id, r, rdate, "Pending") for r, rdate in enumerate(round_dates, start=1)],
+                page_size=INSERT_PAGE_SIZE,
+            )
+
+            # 4) contributions: expand participants x rounds inside Postgres
+            # instead of shipping every cell over the wire.
+            cur.execute(
+                """
+                INSERT INTO contributions (group_id, round_number, participant_id, paid_yesno, paid_date)
+                SELECT %s, r.round_number, p.participant_id, 'No', NULL
+                  FROM unnest(%s::int[]) AS p(participant_id)
+                 CROSS JOIN generate_series(1, %s) AS r(round_number)
+                """,
+                (group_id, participant_ids, total_rounds),
+            )
+
+            # 5) receivables
+            execute_values(
+                cur,
+                """
+                INSERT INTO receivables (group_id, round_number, participant_id, received_yesno, received_date, received_amount)
+                VALUES %s
+                """,
+                [(group_id, int(rnd), pid, "No", None, 0.0) for pid, rnd in zip(participant_ids, assigned_rounds)],
+                page_size=INSERT_PAGE_SIZE,
+            )
+
+    invalidate_tables("groups", "participants", "rounds", "contributions", "receivables")
+    return {"group_id": group_id, "participant_ids": participant_ids, "total_rounds": total_rounds}
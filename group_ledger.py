@@ -0,0 +1,306 @@
+# group_ledger.py
+"""
+In-memory ledger of one group: a participants x rounds grid of paid
+flags plus one received flag (and payout round) per participant, held
+as NumPy boolean arrays with id <-> index maps.
+
+Status lookups are O(1), and "who hasn't paid round 3", "what is overdue
+as of today" or "who can receive in round 5" are vectorized over the
+grid instead of filtering 'Yes'/'No' text rows. load_ledger() builds it
+from the database in bulk (contributions are streamed, not fetchall'd)
+and save_ledger() writes back only the cells that changed, one UPDATE
+per table. Cached ledgers are stored bit-packed (one bit per cell).
+"""
+
+import datetime
+
+import numpy as np
+
+from db_handler import cached_result, get_connection, invalidate_tables, iter_query, run_queries
+
+# Contribution rows per FETCH while loading.
+LOAD_BATCH_ROWS = 20_000
+
+# A ledger is stale as soon as any of these is written to.
+LEDGER_TABLES = ("participants", "rounds", "contributions", "receivables")
+
+def _locate(keys, values):
+    """
+    Positions of `values` in the sorted array `keys`, plus a mask of the
+    values actually present.
+    """
+    values = np.asarray(values, dtype=np.int64)
+    if not len(keys):
+        return np.zeros(len(values), dtype=np.int64), np.zeros(len(values), dtype=bool)
+    idx = np.searchsorted(keys, values).clip(0, len(keys) - 1)
+    return idx, keys[idx] == values
+
+class GroupLedger:
+    """
+    participant_ids and round_numbers must be sorted ascending.
+      paid[i, j]      participant i has paid round j
+      expected[i, j]  a contribution row exists for that cell
+      received[i]     participant i has received their payout
+      payout_index[i] index of participant i's payout round (-1 = none)
+    """
+
+    def __init__(self, group_id, participant_ids, participant_names, round_numbers, round_dates,
+                 paid, expected=None, received=None, payout_index=None):
+        self.group_id = int(group_id)
+        self.participant_ids = np.asarray(participant_ids, dtype=np.int64)
+        self.participant_names = list(participant_names)
+        self.round_numbers = np.asarray(round_numbers, dtype=np.int64)
+        self.round_dates = np.asarray(round_dates, dtype="datetime64[D]")
+
+        shape = (len(self.participant_ids), len(self.round_numbers))
+        self.paid = np.asarray(paid, dtype=bool).reshape(shape)
+        self.expected = np.ones(shape, dtype=bool) if expected is None else np.asarray(expected, dtype=bool).reshape(shape)
+        self.received = np.zeros(shape[0], dtype=bool) if received is None else np.asarray(received, dtype=bool)
+        self.payout_index = (np.full(shape[0], -1, dtype=np.int64) if payout_index is None
+                             else np.asarray(payout_index, dtype=np.int64))
+
+        self._pindex = {pid: i for i, pid in enumerate(self.participant_ids.tolist())}
+        self._rindex = {rnd: j for j, rnd in enumerate(self.round_numbers.tolist())}
+        self._mark_saved()
+
+    def _mark_saved(self):
+        self._saved_paid = self.paid.copy()
+        self._saved_received = self.received.copy()
+
+    def _rows(self, participant_ids):
+        if participant_ids is None:
+            return np.arange(len(self.participant_ids))
+        return np.array([self._pindex[int(pid)] for pid in participant_ids], dtype=np.int64)
+
+    def _cols(self, round_numbers):
+        if round_numbers is None:
+            return np.arange(len(self.round_numbers))
+        return np.array([self._rindex[int(rnd)] for rnd in round_numbers], dtype=np.int64)
+
+    # ─────────────── lookups ───────────────
+
+    def is_paid(self, participant_id, round_number):
+        return bool(self.paid[self._pindex[participant_id], self._rindex[round_number]])
+
+    def is_received(self, participant_id):
+        return bool(self.received[self._pindex[participant_id]])
+
+    def name_of(self, participant_id):
+        return self.participant_names[self._pindex[participant_id]]
+
+    # ─────────────── vectorized queries ───────────────
+
+    def unpaid_in_round(self, round_number):
+        """
+        Participant ids with an unpaid contribution in this round.
+        """
+        j = self._rindex[round_number]
+        return self.participant_ids[self.expected[:, j] & ~self.paid[:, j]]
+
+    def unpaid_counts(self):
+        """
+        Unpaid contributions per round (aligned with round_numbers).
+        """
+        return (self.expected & ~self.paid).sum(axis=0)
+
+    def overdue(self, as_of):
+        """
+        (participant_ids, round_numbers) of every unpaid contribution whose
+        round is dated on or before as_of.
+        """
+        due = self.round_dates <= np.datetime64(as_of, "D")
+        i, j = np.nonzero(self.expected & ~self.paid & due[np.newaxis, :])
+        return self.participant_ids[i], self.round_numbers[j]
+
+    def eligible_receivers(self, round_number):
+        """
+        Participants whose payout is in this round and who haven't received it.
+        """
+        j = self._rindex[round_number]
+        return self.participant_ids[(self.payout_index == j) & ~self.received]
+
+    # ─────────────── updates (in memory; see save_ledger) ───────────────
+
+    def set_paid(self, participant_ids=None, round_numbers=None, value=True):
+        """
+        Set the paid flag of every existing contribution in the selected
+        participants x rounds (None = all).
+        """
+        cells = np.ix_(self._rows(participant_ids), self._cols(round_numbers))
+        self.paid[cells] = np.where(self.expected[cells], value, self.paid[cells])
+
+    def set_received(self, participant_ids, value=True):
+        rows = self._rows(participant_ids)
+        rows = rows[self.payout_index[rows] >= 0]  # no receivable row => nothing to mark
+        self.received[rows] = value
+
+    def changes(self):
+        """
+        Cells that differ from the database: {"paid": (pids, rounds, flags),
+        "received": (pids, payout rounds, flags)}.
+        """
+        i, j = np.nonzero(self.paid != self._saved_paid)
+        k = np.nonzero(self.received != self._saved_received)[0]
+        return {
+            "paid": (self.participant_ids[i], self.round_numbers[j], self.paid[i, j]),
+            "received": (self.participant_ids[k], self.round_numbers[self.payout_index[k]], self.received[k]),
+        }
+
+    # ─────────────── compact form ───────────────
+
+    def packed(self):
+        """
+        Bit-packed copy of the ledger (8 cells per byte) for caching.
+        """
+        return {
+            "group_id": self.group_id,
+            "participant_ids": self.participant_ids,
+            "participant_names": self.participant_names,
+            "round_numbers": self.round_numbers,
+            "round_dates": self.round_dates,
+            "paid": np.packbits(self.paid, axis=1),
+            "expected": np.packbits(self.expected, axis=1),
+            "received": np.packbits(self.received),
+            "payout_index": self.payout_index.astype(np.int32),
+        }
+
+    @classmethod
+    def from_packed(cls, data):
+        n_participants, n_rounds = len(data["participant_ids"]), len(data["round_numbers"])
+        return cls(
+            data["group_id"],
+            data["participant_ids"].copy(),
+            data["participant_names"],
+            data["round_numbers"].copy(),
+            data["round_dates"].copy(),
+            np.unpackbits(data["paid"], axis=1, count=n_rounds).astype(bool),
+            expected=np.unpackbits(data["expected"], axis=1, count=n_rounds).astype(bool),
+            received=np.unpackbits(data["received"], count=n_participants).astype(bool),
+            payout_index=data["payout_index"].astype(np.int64),
+        )
+
+# ───────────────────────────── database ─────────────────────────────
+
+def _read_ledger(group_id):
+    meta = run_queries({
+        "participants": ("""
+            SELECT participant_id, participant_name
+              FROM participants
+             WHERE group_id = %s
+             ORDER BY participant_id
+        """, (group_id,)),
+        "rounds": ("""
+            SELECT round_number, MIN(round_date) AS round_date
+              FROM rounds
+             WHERE group_id = %s
+             GROUP BY round_number
+             ORDER BY round_number
+        """, (group_id,)),
+        "receivables": ("""
+            SELECT participant_id,
+                   MIN(round_number) AS round_number,
+                   COALESCE(bool_or(received_yesno = 'Yes'), false) AS received
+              FROM receivables
+             WHERE group_id = %s
+             GROUP BY participant_id
+        """, (group_id,)),
+    })
+
+    participant_ids = np.array([r["participant_id"] for r in meta["participants"]], dtype=np.int64)
+    round_numbers = np.array([r["round_number"] for r in meta["rounds"]], dtype=np.int64)
+    round_dates = np.array([r["round_date"] for r in meta["rounds"]], dtype="datetime64[D]")
+
+    shape = (len(participant_ids), len(round_numbers))
+    paid = np.zeros(shape, dtype=bool)
+    expected = np.zeros(shape, dtype=bool)
+    # COALESCE: hand-made databases may lack the NOT NULL on the flag columns
+    for batch in iter_query(
+        "SELECT participant_id, round_number, COALESCE(paid_yesno = 'Yes', false) FROM contributions WHERE group_id = %s",
+        (group_id,), itersize=LOAD_BATCH_ROWS, batches=True,
+    ):
+        cells = np.array(batch, dtype=np.int64).reshape(-1, 3)
+        i, i_ok = _locate(participant_ids, cells[:, 0])
+        j, j_ok = _locate(round_numbers, cells[:, 1])
+        ok = i_ok & j_ok
+        expected[i[ok], j[ok]] = True
+        np.logical_or.at(paid, (i[ok], j[ok]), cells[ok, 2].astype(bool))
+
+    received = np.zeros(shape[0], dtype=bool)
+    payout_index = np.full(shape[0], -1, dtype=np.int64)
+    if meta["receivables"]:
+        i, i_ok = _locate(participant_ids, [r["participant_id"] for r in meta["receivables"]])
+        j, j_ok = _locate(round_numbers, [r["round_number"] for r in meta["receivables"]])
+        flags = np.array([bool(r["received"]) for r in meta["receivables"]])
+        received[i[i_ok]] = flags[i_ok]
+        payout_index[i[i_ok & j_ok]] = j[i_ok & j_ok]
+
+    return GroupLedger(group_id, participant_ids, [r["participant_name"] for r in meta["participants"]],
+                       round_numbers, round_dates, paid, expected, received, payout_index)
+
+def load_ledger(group_id, ttl=None):
+    """
+    Build a group's ledger from the database in bulk. With ttl the packed
+    ledger is kept in the query-result cache (dropped on any write to
+    LEDGER_TABLES); every call still returns a fresh, private object.
+    """
+    group_id = int(group_id)
+    if ttl is None:
+        return _read_ledger(group_id)
+    packed = cached_result(("ledger", group_id), LEDGER_TABLES, lambda: _read_ledger(group_id).packed(), ttl)
+    return GroupLedger.from_packed(packed)
+
+_SAVE_SQL = {
+    "paid": """
+        UPDATE contributions t
+           SET paid_yesno = CASE WHEN u.flag THEN 'Yes' ELSE 'No' END,
+               paid_date  = CASE WHEN u.flag THEN %(on_date)s END
+          FROM unnest(%(participant_ids)s::int[], %(round_numbers)s::int[], %(flags)s::bool[])
+               AS u(participant_id, round_number, flag)
+         WHERE t.group_id = %(group_id)s
+           AND t.participant_id = u.participant_id
+           AND t.round_number = u.round_number
+           AND (t.paid_yesno = 'Yes') <> u.flag
+    """,
+    "received": """
+        UPDATE receivables t
+           SET received_yesno = CASE WHEN u.flag THEN 'Yes' ELSE 'No' END,
+               received_date  = CASE WHEN u.flag THEN %(on_date)s END
+          FROM unnest(%(participant_ids)s::int[], %(round_numbers)s::int[], %(flags)s::bool[])
+               AS u(participant_id, round_number, flag)
+         WHERE t.group_id = %(group_id)s
+           AND t.participant_id = u.participant_id
+           AND t.round_number = u.round_number
+           AND (t.received_yesno = 'Yes') <> u.flag
+    """,
+}
+
+_SAVE_TABLES = {"paid": "contributions", "received": "receivables"}
+
+def save_ledger(ledger, on_date=None):
+    """
+    Write every changed paid/received flag back in ONE transaction (at
+    most one UPDATE per table). Rows already in the target state are not
+    touched. Returns {"paid": rows updated, "received": rows updated}.
+    """
+    on_date = on_date or datetime.date.today()
+    changes = ledger.changes()
+    updated = {}
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            for kind, (pids, rounds, flags) in changes.items():
+                if not len(pids):
+                    updated[kind] = 0
+                    continue
+                cur.execute(_SAVE_SQL[kind], {
+                    "group_id": ledger.group_id,
+                    "on_date": on_date,
+                    "participant_ids": pids.tolist(),
+                    "round_numbers": rounds.tolist(),
+                    "flags": flags.tolist(),
+                })
+                updated[kind] = cur.rowcount
+    changed = [_SAVE_TABLES[kind] for kind, n in updated.items() if n]
+    if changed:
+        invalidate_tables(*changed)
+    ledger._mark_saved()
+    return updated
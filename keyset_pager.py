@@ -0,0 +1,31 @@
+# keyset_pager.py
+"""Previous/Next paging over keyset queries (fetch functions taking an `after` key)."""
+
+import streamlit as st
+
+def page_cursors(prefix, signature):
+    """
+    Start key of every page visited so far (None for the first page), kept
+    in session state under `prefix` and reset whenever `signature` (the
+    query's sort/filter inputs) changes. The current page starts at
+    cursors[-1].
+    """
+    if st.session_state.get(f"{prefix}_signature") != signature:
+        st.session_state[f"{prefix}_signature"] = signature
+        st.session_state[f"{prefix}_cursors"] = [None]
+    return st.session_state[f"{prefix}_cursors"]
+
+def pager_controls(prefix, cursors, next_key, caption, scope="app"):
+    """
+    ◀ Previous / caption / Next ▶ row. next_key is the key returned by the
+    fetch for the page after this one (None on the last page); scope is
+    passed to st.rerun ("fragment" inside a fragment).
+    """
+    c1, c2, c3 = st.columns([1, 4, 1])
+    if c1.button("◀ Previous", disabled=len(cursors) == 1, key=f"{prefix}_prev"):
+        cursors.pop()
+        st.rerun(scope=scope)
+    c2.write(caption)
+    if c3.button("Next ▶", disabled=next_key is None, key=f"{prefix}_next"):
+        cursors.append(next_key)
+        st.rerun(scope=scope)
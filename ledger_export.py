@@ -0,0 +1,188 @@
+# ledger_export.py
+"""Streaming ledger export to CSV, XLSX or Parquet from a server-side cursor."""
+
+import csv
+import datetime
+import os
+import tempfile
+from dataclasses import dataclass
+
+import openpyxl
+
+from db_handler import iter_query, run_query
+
+# Rows per FETCH from the server-side cursor (and per file write).
+FETCH_ROWS = 10_000
+
+# Excel's row limit; longer ledgers continue on "Ledger 2", "Ledger 3", ...
+XLSX_MAX_ROWS = 1_048_576
+
+LEDGER_COLUMNS = [
+    "Group ID", "Group Name", "Participant ID", "Participant Name",
+    "Round Number", "Contribution", "Share Fraction",
+    "Contribution Paid", "Paid Date",
+    "Receivable Status", "Received Amount", "Received Date",
+]
+
+_LEDGER_FROM = """
+      FROM contributions c
+      JOIN participants p ON p.participant_id = c.participant_id
+      JOIN groups g ON g.group_id = c.group_id
+      LEFT JOIN receivables r ON r.participant_id = c.participant_id
+                             AND r.group_id = c.group_id
+                             AND r.round_number = c.round_number
+"""
+
+def _where(group_ids):
+    if group_ids:
+        return "WHERE c.group_id = ANY(%s)", (list(group_ids),)
+    return "", ()
+
+def count_ledger_rows(group_ids=None):
+    where, params = _where(group_ids)
+    return run_query(f"SELECT COUNT(*) AS n {_LEDGER_FROM} {where}", params)[0]["n"]
+
+def iter_ledger_chunks(group_ids=None, chunk_rows=FETCH_ROWS):
+    """
+    Yield lists of at most chunk_rows ledger tuples (LEDGER_COLUMNS order),
+    streamed from a server-side cursor (db_handler.iter_query). The pooled
+    connection is held until the generator finishes or is closed.
+    """
+    where, params = _where(group_ids)
+    sql = f"""
+    SELECT c.group_id, g.group_name, p.participant_id, p.participant_name,
+           c.round_number, p.contribution, p.share_fraction,
+           c.paid_yesno, c.paid_date,
+           r.received_yesno, r.received_amount, r.received_date
+    {_LEDGER_FROM}
+    {where}
+     ORDER BY c.group_id, c.round_number, c.contribution_id
+    """
+    return iter_query(sql, params, itersize=chunk_rows, batches=True)
+
+# ───────────────────────────── writers ─────────────────────────────
+# Each writer consumes the chunk iterator, writes to `path` and yields the
+# number of rows written so far after every chunk.
+
+def _write_csv(chunks, path):
+    written = 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(LEDGER_COLUMNS)
+        for rows in chunks:
+            writer.writerows(rows)
+            written += len(rows)
+            yield written
+
+def _write_xlsx(chunks, path):
+    wb = openpyxl.Workbook(write_only=True)
+    ws, sheet_rows, sheets = None, XLSX_MAX_ROWS, 0
+    written = 0
+    for rows in chunks:
+        for row in rows:
+            if sheet_rows >= XLSX_MAX_ROWS:
+                sheets += 1
+                ws = wb.create_sheet("Ledger" if sheets == 1 else f"Ledger {sheets}")
+                ws.append(LEDGER_COLUMNS)
+                sheet_rows = 1
+            ws.append(row)
+            sheet_rows += 1
+        written += len(rows)
+        yield written
+    if ws is None:
+        wb.create_sheet("Ledger").append(LEDGER_COLUMNS)
+    wb.save(path)
+
+def _parquet_schema():
+    import pyarrow as pa
+    status = pa.dictionary(pa.int8(), pa.string())
+    return pa.schema([
+        ("Group ID", pa.int32()), ("Group Name", pa.string()),
+        ("Participant ID", pa.int32()), ("Participant Name", pa.string()),
+        ("Round Number", pa.int32()), ("Contribution", pa.float64()),
+        ("Share Fraction", pa.float64()),
+        ("Contribution Paid", status), ("Paid Date", pa.date32()),
+        ("Receivable Status", status), ("Received Amount", pa.float64()),
+        ("Received Date", pa.date32()),
+    ])
+
+def _write_parquet(chunks, path):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = _parquet_schema()
+    written = 0
+    with pq.ParquetWriter(path, schema, compression="zstd") as writer:
+        for rows in chunks:
+            columns = list(zip(*rows))
+            arrays = []
+            for values, fld in zip(columns, schema):
+                if pa.types.is_floating(fld.type):
+                    # NUMERIC arrives as Decimal
+                    values = [None if v is None else float(v) for v in values]
+                if pa.types.is_dictionary(fld.type):
+                    arrays.append(pa.array(values, pa.string()).dictionary_encode().cast(fld.type))
+                else:
+                    arrays.append(pa.array(values, fld.type))
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            written += len(rows)
+            yield written
+
+# label -> (file extension, MIME type, writer)
+EXPORT_FORMATS = {
+    "CSV": (".csv", "text/csv", _write_csv),
+    "Excel (.xlsx)": (".xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", _write_xlsx),
+    "Parquet": (".parquet", "application/vnd.apache.parquet", _write_parquet),
+}
+
+@dataclass
+class LedgerExport:
+    path: str              # temporary file the ledger is written to
+    file_name: str         # suggested download name
+    mime: str
+    format: str
+    group_ids: tuple = ()  # empty = all groups
+    total_rows: int = 0    # COUNT(*) taken before writing (progress only)
+    rows_written: int = 0
+
+    def discard(self):
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+def start_export(fmt, group_ids=None):
+    """
+    Count the rows to export and reserve a temporary file for them.
+    """
+    suffix, mime, _ = EXPORT_FORMATS[fmt]
+    group_ids = tuple(group_ids or ())
+    total_rows = count_ledger_rows(group_ids)  # before mkstemp, so a failed count leaks nothing
+    fd, path = tempfile.mkstemp(prefix="quraa_ledger_", suffix=suffix)
+    os.close(fd)
+    scope = "all" if not group_ids else "-".join(map(str, group_ids[:5])) + ("-etc" if len(group_ids) > 5 else "")
+    return LedgerExport(
+        path=path,
+        file_name=f"quraa_ledger_{scope}_{datetime.date.today():%Y%m%d}{suffix}",
+        mime=mime,
+        format=fmt,
+        group_ids=group_ids,
+        total_rows=total_rows,
+    )
+
+def write_ledger(export, chunk_rows=FETCH_ROWS):
+    """
+    Stream the ledger into export.path, yielding the running row count
+    after every chunk. The partial file is removed if writing fails or
+    the generator is abandoned (e.g. the script run is interrupted).
+    """
+    _, _, writer = EXPORT_FORMATS[export.format]
+    chunks = iter_ledger_chunks(export.group_ids, chunk_rows)
+    completed = False
+    try:
+        for written in writer(chunks, export.path):
+            export.rows_written = written
+            yield written
+        completed = True
+    finally:
+        chunks.close()
+        if not completed:
+            export.discard()
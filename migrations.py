@@ -0,0 +1,222 @@
+# migrations.py
+"""
+Versioned schema migrations for the Quraa database.
+
+Every migration is idempotent DDL applied in its own transaction and
+recorded in `schema_migrations`, so running the runner again (or against
+an existing Neon database created by hand) only applies what is missing.
+
+    python migrations.py                 # DSN from $QURAA_DSN / $DATABASE_URL / .streamlit/secrets.toml
+    python migrations.py --dsn postgres://...
+    python migrations.py --status
+"""
+
+import argparse
+import os
+import sys
+
+import psycopg2
+
+# Arbitrary constant so two runners never apply migrations at the same time.
+MIGRATION_LOCK_ID = 727_001
+
+MIGRATIONS = [
+    (1, "base schema", """
+        CREATE TABLE IF NOT EXISTS groups (
+            group_id             SERIAL PRIMARY KEY,
+            group_name           TEXT NOT NULL,
+            start_date           DATE,
+            total_rounds         INTEGER NOT NULL DEFAULT 0,
+            monthly_contribution NUMERIC(12, 2)
+        );
+
+        CREATE TABLE IF NOT EXISTS participants (
+            participant_id           SERIAL PRIMARY KEY,
+            participant_name         TEXT NOT NULL,
+            group_id                 INTEGER NOT NULL REFERENCES groups (group_id),
+            participant_order        INTEGER,
+            contribution             NUMERIC(12, 2),
+            share_fraction           NUMERIC(10, 6),
+            participant_contact_info TEXT
+        );
+
+        CREATE TABLE IF NOT EXISTS rounds (
+            round_id     SERIAL PRIMARY KEY,
+            group_id     INTEGER NOT NULL REFERENCES groups (group_id),
+            round_number INTEGER NOT NULL,
+            round_date   DATE NOT NULL,
+            round_status TEXT NOT NULL DEFAULT 'Pending'
+        );
+
+        CREATE TABLE IF NOT EXISTS contributions (
+            contribution_id SERIAL PRIMARY KEY,
+            group_id        INTEGER NOT NULL REFERENCES groups (group_id),
+            round_number    INTEGER NOT NULL,
+            participant_id  INTEGER NOT NULL REFERENCES participants (participant_id),
+            paid_yesno      TEXT NOT NULL DEFAULT 'No' CHECK (paid_yesno IN ('Yes', 'No')),
+            paid_date       DATE
+        );
+
+        CREATE TABLE IF NOT EXISTS receivables (
+            receivable_id   SERIAL PRIMARY KEY,
+            group_id        INTEGER NOT NULL REFERENCES groups (group_id),
+            round_number    INTEGER NOT NULL,
+            participant_id  INTEGER NOT NULL REFERENCES participants (participant_id),
+            received_yesno  TEXT NOT NULL DEFAULT 'No' CHECK (received_yesno IN ('Yes', 'No')),
+            received_date   DATE,
+            received_amount NUMERIC(12, 2) DEFAULT 0
+        );
+
+        CREATE TABLE IF NOT EXISTS users (
+            user_id    SERIAL PRIMARY KEY,
+            username   TEXT,
+            email      TEXT NOT NULL,
+            role       TEXT NOT NULL DEFAULT 'participant',
+            created_at TIMESTAMP NOT NULL DEFAULT now()
+        );
+    """),
+    (2, "hot-path indexes", """
+        -- Payments tab, overview, alerts: per group/round status lookups
+        CREATE INDEX IF NOT EXISTS contributions_group_round_paid_idx
+            ON contributions (group_id, round_number, paid_yesno);
+        CREATE INDEX IF NOT EXISTS contributions_unpaid_idx
+            ON contributions (group_id, round_number) WHERE paid_yesno = 'No';
+        CREATE INDEX IF NOT EXISTS contributions_participant_idx
+            ON contributions (participant_id);
+
+        -- Receivables tab and unreceived alerts
+        CREATE INDEX IF NOT EXISTS receivables_group_round_received_idx
+            ON receivables (group_id, round_number, received_yesno);
+        CREATE INDEX IF NOT EXISTS receivables_unreceived_idx
+            ON receivables (group_id, round_number) WHERE received_yesno = 'No';
+        CREATE INDEX IF NOT EXISTS receivables_participant_idx
+            ON receivables (participant_id);
+
+        -- Round lookups by group and by due date (alerts, upcoming rounds)
+        CREATE INDEX IF NOT EXISTS rounds_group_date_idx ON rounds (group_id, round_date);
+        CREATE INDEX IF NOT EXISTS rounds_group_number_idx ON rounds (group_id, round_number);
+        CREATE INDEX IF NOT EXISTS rounds_date_idx ON rounds (round_date);
+
+        CREATE INDEX IF NOT EXISTS participants_group_idx ON participants (group_id);
+        CREATE INDEX IF NOT EXISTS groups_name_idx ON groups (group_name);
+    """),
+    (3, "unique users(email)", """
+        -- Sign-in used to select-then-insert, which could leave duplicate
+        -- emails. Keep one row per email (highest role, then oldest) and
+        -- report every row removed so an admin can review it.
+        DO $$
+        DECLARE
+            dup RECORD;
+        BEGIN
+            FOR dup IN
+                DELETE FROM users u
+                 USING (SELECT user_id,
+                               ROW_NUMBER() OVER (
+                                   PARTITION BY email
+                                   ORDER BY CASE role WHEN 'admin' THEN 0 WHEN 'participant' THEN 1 ELSE 2 END,
+                                            user_id
+                               ) AS rn
+                          FROM users) d
+                 WHERE u.user_id = d.user_id
+                   AND d.rn > 1
+                RETURNING u.user_id, u.email, u.role
+            LOOP
+                RAISE WARNING 'removed duplicate user % (%, role %)', dup.user_id, dup.email, dup.role;
+            END LOOP;
+        END
+        $$;
+        CREATE UNIQUE INDEX IF NOT EXISTS users_email_key ON users (email);
+    """),
+]
+
+def _ensure_version_table(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version     INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            applied_at  TIMESTAMP NOT NULL DEFAULT now()
+        )
+    """)
+
+def applied_versions(conn):
+    with conn.cursor() as cur:
+        _ensure_version_table(cur)
+        cur.execute("SELECT version FROM schema_migrations ORDER BY version")
+        versions = [row[0] for row in cur.fetchall()]
+    conn.commit()
+    return versions
+
+def apply_migrations(conn, log=print):
+    """
+    Apply every migration newer than the last recorded version, each in its
+    own transaction together with its schema_migrations row.
+    Returns the list of versions applied by this call.
+    """
+    applied = []
+    with conn.cursor() as cur:
+        cur.execute("SELECT pg_advisory_lock(%s)", (MIGRATION_LOCK_ID,))
+    conn.commit()
+    try:
+        done = set(applied_versions(conn))
+        for version, description, sql in MIGRATIONS:
+            if version in done:
+                continue
+            try:
+                with conn.cursor() as cur:
+                    cur.execute(sql)
+                    for notice in conn.notices:
+                        log(notice.strip())
+                    del conn.notices[:]
+                    cur.execute(
+                        "INSERT INTO schema_migrations (version, description) VALUES (%s, %s)",
+                        (version, description),
+                    )
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            applied.append(version)
+            log(f"Applied migration {version}: {description}")
+    finally:
+        with conn.cursor() as cur:
+            cur.execute("SELECT pg_advisory_unlock(%s)", (MIGRATION_LOCK_ID,))
+        conn.commit()
+    return applied
+
+def _default_dsn():
+    dsn = os.environ.get("QURAA_DSN") or os.environ.get("DATABASE_URL")
+    if dsn:
+        return dsn
+    secrets_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".streamlit", "secrets.toml")
+    if os.path.exists(secrets_path):
+        import tomllib
+        with open(secrets_path, "rb") as f:
+            return tomllib.load(f).get("neon", {}).get("dsn")
+    return None
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Apply Quraa schema migrations.")
+    parser.add_argument("--dsn", default=None, help="PostgreSQL DSN (default: $QURAA_DSN, $DATABASE_URL or secrets.toml)")
+    parser.add_argument("--status", action="store_true", help="Only list applied and pending versions.")
+    args = parser.parse_args(argv)
+
+    dsn = args.dsn or _default_dsn()
+    if not dsn:
+        parser.error("No DSN given and none found in the environment or .streamlit/secrets.toml.")
+
+    conn = psycopg2.connect(dsn)
+    try:
+        if args.status:
+            done = set(applied_versions(conn))
+            for version, description, _ in MIGRATIONS:
+                print(f"{version:>4}  {'applied' if version in done else 'pending':8}  {description}")
+        else:
+            applied = apply_migrations(conn)
+            if not applied:
+                print("Schema is up to date.")
+    finally:
+        conn.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,145 @@
 import streamlit as st
-import pandas as pd
 from datetime import datetime
 from st_aggrid import AgGrid, GridOptionsBuilder
-from db_handler import run_query
+from db_handler import escape_like, run_query, run_query_df, stats_fragment, DEFAULT_CACHE_TTL
+from keyset_pager import page_cursors, pager_controls
+
+# Rows fetched per page of the "Round Contribution Details" grid.
+DETAIL_PAGE_SIZE = 50
+
+# Grid sort orders => keyset columns (last one is unique, so keys never tie).
+DETAIL_SORTS = {
+    "Round, Participant": ("c.round_number", "p.participant_name", "c.contribution_id"),
+    "Participant, Round": ("p.participant_name", "c.round_number", "c.contribution_id"),
+}
+
+DETAIL_COLUMNS = [
+    "Group Name", "Participant Name", "Contribution ID",
+    "Round Number", "Contribution Paid", "Paid Date",
+    "Contribution", "Share Fraction", "Receivable Status",
+    "Received Amount", "Received Date"
+]
+
+SUMMARY_COLUMNS = [
+    "Participant Name",
+    "Total Contribution",
+    "Paid Rounds",
+    "Unpaid Rounds",
+    "Total Rounds",
+    "Received"
+]
+
+# Contributions and receivables are pre-aggregated per participant before
+# joining, so nothing fans out. A participant with no contribution rows
+# still counts as one (unpaid) round, as the old pandas groupby did.
+SUMMARY_SQL = """
+WITH contrib AS (
+    SELECT participant_id,
+           COUNT(*) AS total_rounds,
+           COUNT(*) FILTER (WHERE paid_yesno = 'Yes') AS paid_rounds
+      FROM contributions
+     WHERE group_id = %(group_id)s
+     GROUP BY participant_id
+),
+recv AS (
+    SELECT participant_id,
+           bool_or(received_yesno = 'Yes') AS received
+      FROM receivables
+     WHERE group_id = %(group_id)s
+     GROUP BY participant_id
+)
+SELECT p.participant_name,
+       COALESCE(p.contribution, 0) * GREATEST(COALESCE(c.total_rounds, 0), 1) AS total_contribution,
+       COALESCE(c.paid_rounds, 0) AS paid_rounds,
+       GREATEST(COALESCE(c.total_rounds, 0), 1) - COALESCE(c.paid_rounds, 0) AS unpaid_rounds,
+       GREATEST(COALESCE(c.total_rounds, 0), 1) AS total_rounds,
+       CASE WHEN r.received THEN 'Yes' ELSE 'No' END AS received
+  FROM participants p
+  LEFT JOIN contrib c ON c.participant_id = p.participant_id
+  LEFT JOIN recv r ON r.participant_id = p.participant_id
+ WHERE p.group_id = %(group_id)s
+ ORDER BY p.participant_name, p.participant_id
+"""
+
+def fetch_participant_summary(group_id):
+    """
+    Per-participant totals for the "Participant Overview" table.
+    """
+    return run_query_df(SUMMARY_SQL, {"group_id": group_id}, columns=SUMMARY_COLUMNS)
+
+def _detail_where(group_id, filters):
+    where = ["c.group_id = %s"]
+    params = [group_id]
+    if filters.get("participant"):
+        where.append("p.participant_name ILIKE %s")
+        params.append(escape_like(filters["participant"]) + "%")
+    if filters.get("round"):
+        where.append("c.round_number = %s")
+        params.append(int(filters["round"]))
+    if filters.get("paid") in ("Yes", "No"):
+        where.append("c.paid_yesno = %s")
+        params.append(filters["paid"])
+    if filters.get("received") in ("Yes", "No"):
+        where.append("COALESCE(r.received_yesno, 'No') = %s")
+        params.append(filters["received"])
+    return where, params
+
+_DETAIL_FROM = """
+      FROM contributions c
+      JOIN participants p ON p.participant_id = c.participant_id
+      JOIN groups g ON g.group_id = c.group_id
+      LEFT JOIN receivables r ON r.participant_id = c.participant_id
+                             AND r.group_id = c.group_id
+                             AND r.round_number = c.round_number
+"""
+
+def fetch_detail_page(group_id, sort, descending=False, filters=None, after=None, page_size=DETAIL_PAGE_SIZE):
+    """
+    One keyset page of contribution x receivable rows for a group.
+    `after` is the sort key of the last row of the previous page (None for
+    the first page), so the database seeks straight to the page instead of
+    scanning and discarding OFFSET rows. Returns (DataFrame, next_key or None).
+    """
+    keys = DETAIL_SORTS[sort]
+    direction = "DESC" if descending else "ASC"
+    where, params = _detail_where(group_id, filters or {})
+    if after is not None:
+        where.append(f"({', '.join(keys)}) {'<' if descending else '>'} (%s, %s, %s)")
+        params.extend(after)
+
+    sql = f"""
+    SELECT g.group_name,
+           p.participant_name,
+           c.contribution_id,
+           c.round_number,
+           c.paid_yesno AS contribution_paid,
+           c.paid_date,
+           p.contribution,
+           p.share_fraction,
+           r.received_yesno AS receivable_status,
+           r.received_amount,
+           r.received_date
+    {_DETAIL_FROM}
+     WHERE {' AND '.join(where)}
+     ORDER BY {', '.join(f'{k} {direction}' for k in keys)}
+     LIMIT %s
+    """
+    rows = run_query_df(sql, (*params, page_size + 1))
+    if len(rows) <= page_size:
+        return rows, None
+    rows = rows.iloc[:page_size]
+    # Back to plain Python values so psycopg2 can bind them next time
+    last = [rows[k.split(".")[1]].iloc[-1] for k in keys]
+    return rows, tuple(v.item() if hasattr(v, "item") else v for v in last)
+
+def count_detail_rows(group_id, filters=None):
+    """
+    Rows matching the filters. Cached, so paging through the grid does not
+    repeat the full count; any write to the joined tables drops it.
+    """
+    where, params = _detail_where(group_id, filters or {})
+    sql = f"SELECT COUNT(*) AS n {_DETAIL_FROM} WHERE {' AND '.join(where)}"
+    return run_query(sql, params, ttl=DEFAULT_CACHE_TTL)[0]["n"]
 
 def overview():
     """
@@ -14,103 +151,74 @@ def overview():
     st.sidebar.write(datetime.now().strftime("%Y-%m-%d"))
 
     # 1) Fetch list of group names from the DB
-    group_rows = run_query("SELECT group_name FROM groups ORDER BY group_name;")
+    group_rows = run_query("SELECT group_id, group_name FROM groups ORDER BY group_name;", ttl=DEFAULT_CACHE_TTL)
     if not group_rows:
         st.warning("No groups found in the database.")
         return
 
-    group_names = [row["group_name"] for row in group_rows]
-    selected_group = st.selectbox("Select a group to view details", group_names)
+    name_to_id = {row["group_name"]: row["group_id"] for row in group_rows}
+    selected_group = st.selectbox("Select a group to view details", list(name_to_id))
+    diagnostics = st.sidebar.toggle("Diagnostics mode", key="overview_diagnostics",
+                                    help="Show raw SQL results for this page.")
 
     if not selected_group:
         st.info("Please select a group.")
         return
 
-    # 2) Dynamic SQL with parameter binding
-    sql = """
-    SELECT
-        g.group_name,
-        p.participant_name,
-        c.contribution_id,
-        c.round_number,
-        c.paid_yesno AS contribution_paid,
-        c.paid_date,
-        p.contribution,
-        p.share_fraction,
-        r.received_yesno AS receivable_status,
-        r.received_amount,
-        r.received_date
-    FROM participants p
-    JOIN groups g ON p.group_id = g.group_id
-    LEFT JOIN contributions c ON c.participant_id = p.participant_id
-                               AND c.group_id = p.group_id
-    LEFT JOIN receivables r ON r.participant_id = p.participant_id
-                             AND r.group_id = p.group_id
-                             AND r.round_number = c.round_number
-    WHERE g.group_name = %s;
-    """
-    rows = run_query(sql, (selected_group,))
+    group_id = name_to_id[selected_group]
+
+    # 2) Participant Overview, aggregated in SQL (one row per participant)
+    rows = fetch_participant_summary(group_id)
 
-    # DEBUG: Show the raw results
-    st.write("Selected group:", selected_group)
-    st.write("Raw data from SQL query:", rows)
+    if diagnostics:
+        with st.expander("Diagnostics: participant summary query"):
+            st.write("Selected group:", selected_group)
+            st.write("Raw data from SQL query:", rows)
 
-    if not rows:
+    if rows.empty:
         st.warning(f"No data found for group '{selected_group}'.")
         return
 
-    # 3) Convert result to DataFrame
-    columns = [
-        "Group Name", "Participant Name", "Contribution ID",
-        "Round Number", "Contribution Paid", "Paid Date",
-        "Contribution", "Share Fraction", "Receivable Status",
-        "Received Amount", "Received Date"
-    ]
-    df = pd.DataFrame(rows, columns=columns)
-
-    # 4) Participant Overview Aggregation
     st.subheader("Participant Overview")
-    df["Contribution"] = df["Contribution"].fillna(0)
-    df["Contribution Paid"] = df["Contribution Paid"].fillna("No")
-    df["Receivable Status"] = df["Receivable Status"].fillna("No")
-    df["Round Number"] = df["Round Number"].fillna(0)
-
-    group_cols = ["Participant Name"]
-    aggs = {
-        "Contribution": "sum",
-        "Contribution Paid": lambda x: (x == "Yes").sum(),
-        "Round Number": "count",
-        "Receivable Status": lambda x: (x == "Yes").any()
-    }
+    st.table(rows)
 
-    summary = df.groupby(group_cols).agg(aggs).reset_index()
-    summary.rename(columns={
-        "Contribution": "Total Contribution",
-        "Contribution Paid": "Paid Rounds",
-        "Round Number": "Total Rounds",
-        "Receivable Status": "Received"
-    }, inplace=True)
-
-    summary["Unpaid Rounds"] = summary["Total Rounds"] - summary["Paid Rounds"]
-    summary["Received"] = summary["Received"].apply(lambda x: "Yes" if x else "No")
-
-    summary = summary[[
-        "Participant Name",
-        "Total Contribution",
-        "Paid Rounds",
-        "Unpaid Rounds",
-        "Total Rounds",
-        "Received"
-    ]]
-
-    st.table(summary)
-
-    # 5) Detailed Contribution Table
+    # 3) Detailed Contribution Table (server-side paged)
     st.subheader("Round Contribution Details")
+    _render_detail_grid(group_id, diagnostics)
+
+@stats_fragment
+def _render_detail_grid(group_id, diagnostics=False):
+    """
+    Keyset-paginated grid: sorting and filtering run in SQL and only the
+    visible page is fetched and sent to the browser. Runs as a fragment
+    that depends only on group_id, so paging or filtering reruns just the
+    grid's two queries, not the group list or participant summary.
+    """
+    f1, f2, f3, f4, f5, f6 = st.columns([3, 2, 2, 2, 3, 1])
+    filters = {
+        "participant": f1.text_input("Participant starts with", key="detail_participant").strip(),
+        "round": f2.number_input("Round (0 = all)", min_value=0, step=1, key="detail_round"),
+        "paid": f3.selectbox("Paid", ["All", "Yes", "No"], key="detail_paid"),
+        "received": f4.selectbox("Received", ["All", "Yes", "No"], key="detail_received"),
+    }
+    sort = f5.selectbox("Sort by", list(DETAIL_SORTS), key="detail_sort")
+    descending = f6.toggle("Desc", key="detail_desc")
+
+    # Page cursors, reset when the query changes
+    cursors = page_cursors("detail", (group_id, sort, descending, tuple(sorted(filters.items()))))
+
+    rows, next_key = fetch_detail_page(group_id, sort, descending, filters, after=cursors[-1])
+    total = count_detail_rows(group_id, filters)
+
+    if rows.empty:
+        st.info("No rows match these filters.")
+        return
+
+    df = rows.set_axis(DETAIL_COLUMNS, axis=1)
+    for col in ("Paid Date", "Received Date"):
+        df[col] = df[col].dt.strftime("%Y-%m-%d")
     gb = GridOptionsBuilder.from_dataframe(df)
-    gb.configure_default_column(editable=False, filter=True, sortable=True)
-    gb.configure_pagination(paginationAutoPageSize=True)
-    gb.configure_side_bar()
+    gb.configure_default_column(editable=False, filter=False, sortable=False)
     grid_options = gb.build()
 
     AgGrid(
@@ -120,3 +228,13 @@ def overview():
         fit_columns_on_grid_load=True,
         theme="streamlit"
     )
+
+    page = len(cursors)
+    first = (page - 1) * DETAIL_PAGE_SIZE + 1
+    pager_controls("detail", cursors, next_key, f"Rows {first}–{first + len(rows) - 1} of {total} (page {page})",
+                   scope="fragment")
+
+    if diagnostics:
+        with st.expander("Diagnostics: current grid page"):
+            st.write("Page start key:", cursors[-1], "Next key:", next_key)
+            st.write("Raw data from SQL query:", rows)
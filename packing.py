@@ -0,0 +1,299 @@
+# packing.py
+"""Fraction packing of participants into rounds that each sum to exactly 1.0."""
+
+from dataclasses import dataclass, field
+from fractions import Fraction
+from math import lcm
+
+import numpy as np
+
+# Single tolerance for every fraction comparison (round full, overshoot, leftover).
+FRACTION_TOLERANCE = 1e-9
+
+# Largest denominator tried first when reading a float share as a rational (0.333 -> 1/3).
+MAX_DENOMINATOR = 1000
+
+# Otherwise a share is read from its decimal digits (0.1234 -> 617/5000), to
+# the precision FRACTION_TOLERANCE can tell apart.
+SHARE_DECIMALS = 9
+
+# Search nodes allowed per round, and per packing in total, while looking
+# for exact fills; past the total every remaining round is filled greedily.
+EXACT_FILL_BUDGET = 200_000
+EXACT_FILL_TOTAL_BUDGET = 100_000
+
+# Days between two rounds for each supported round duration.
+ROUND_DURATION_DAYS = {"weekly": 7, "monthly": 30}
+
+@dataclass
+class PackingResult:
+    round_numbers: np.ndarray          # int, round assigned to each participant (1-based)
+    round_dates: np.ndarray            # datetime64[D], date of each participant's round
+    schedule: np.ndarray               # datetime64[D], date of round 1..total_rounds
+    total_rounds: int
+    leftover: float                    # share missing from rounds that could not be filled
+    errors: list = field(default_factory=list)  # [{"row": i or None, "message": str}]
+
+    @property
+    def ok(self):
+        return not self.errors
+
+def round_schedule(start_date, round_duration, total_rounds):
+    """
+    Dates of rounds 1..total_rounds as a datetime64[D] array.
+    """
+    step = ROUND_DURATION_DAYS.get(str(round_duration).strip().lower(), ROUND_DURATION_DAYS["monthly"])
+    start = np.datetime64(start_date, "D")
+    return start + np.arange(total_rounds, dtype=np.int64) * np.timedelta64(step, "D")
+
+def _empty_result(errors):
+    empty = np.array([], dtype="datetime64[D]")
+    return PackingResult(np.array([], dtype=np.int64), empty, empty, 0, 0.0, errors)
+
+def _validate(fractions, tolerance):
+    """
+    Structural problems that make packing meaningless (empty list, bad values).
+    """
+    if fractions.size == 0:
+        return [{"row": None, "message": "No participants to pack."}]
+    bad = ~np.isfinite(fractions) | (fractions < 0.0) | (fractions > 1.0 + tolerance)
+    return [
+        {"row": int(i), "message": f"Invalid share fraction {fractions[i]!r}; must be between 0 and 1."}
+        for i in np.flatnonzero(bad)
+    ]
+
+def _build_result(round_numbers, start_date, round_duration, leftover, errors):
+    total_rounds = int(round_numbers.max())
+    schedule = round_schedule(start_date, round_duration, total_rounds)
+    return PackingResult(
+        round_numbers=round_numbers,
+        round_dates=schedule[round_numbers - 1],
+        schedule=schedule,
+        total_rounds=total_rounds,
+        leftover=leftover,
+        errors=errors,
+    )
+
+def _as_rational(value, tolerance, max_denominator):
+    """
+    The small-denominator rational within `tolerance` of value if there is
+    one (so 1/3 stays 1/3), else the value's decimal digits.
+    """
+    rational = Fraction(value).limit_denominator(max_denominator)
+    if abs(float(rational) - value) <= tolerance:
+        return rational
+    return Fraction(f"{value:.{SHARE_DECIMALS}f}")
+
+def _to_units(fractions, tolerance, max_denominator):
+    """
+    Read every share as a rational (_as_rational) and scale it to integer
+    units of a common denominator D (one round = D units). Both packers
+    use this, so they accept exactly the same shares. Returns (units, D).
+    """
+    values, inverse = np.unique(fractions, return_inverse=True)
+    rationals = [_as_rational(float(v), tolerance, max_denominator) for v in values]
+    denom = lcm(*(r.denominator for r in rationals))
+    value_units = np.array([r.numerator * (denom // r.denominator) for r in rationals], dtype=object)
+    units = value_units[inverse]
+    if denom * (len(fractions) + 1) < 2**62:
+        units = units.astype(np.int64)  # cumsum cannot overflow; otherwise stay on exact Python ints
+    return units, denom
+
+def _sequential_rounds(fractions, tol):
+    """
+    Order-preserving next-fit. The running sum restarts at every round
+    boundary, so rounding error never accumulates across rounds.
+    Returns (round_numbers, leftover, first overshooting row or None).
+    """
+    rounds = np.empty(len(fractions), dtype=np.int64)
+    round_number = 1
+    accum = 0.0
+    overshoot = None
+    for i, frac in enumerate(fractions):
+        if accum + frac > 1.0 + tol:
+            if overshoot is None:
+                overshoot = i
+            round_number += 1
+            accum = 0.0
+        rounds[i] = round_number
+        accum += frac
+        if abs(accum - 1.0) < tol:
+            round_number += 1
+            accum = 0.0
+    return rounds, (accum if accum > tol else 0.0), overshoot
+
+def pack_fractions(fractions, start_date, round_duration, tolerance=FRACTION_TOLERANCE):
+    """
+    Assign each participant (in the given order) to a round so that every
+    round's fractions sum to 1.0.
+
+    With no overshoot, a participant's round is fixed by where its share
+    starts on the cumulative-sum axis: floor(start) + 1. That turns the
+    whole assignment into a cumsum + floor over the array. The cumsum runs
+    on exact integer units (see _to_units), so tens of thousands of 0.1
+    shares still land exactly on round boundaries.
+    """
+    fractions = np.asarray(fractions, dtype=np.float64).ravel()
+    errors = _validate(fractions, tolerance)
+    if errors:
+        return _empty_result(errors)
+
+    units, denom = _to_units(fractions, tolerance, MAX_DENOMINATOR)
+    ends = np.cumsum(units)
+    starts = ends - units
+    start_unit = starts // denom
+    straddles = (units > 0) & ((ends - 1) // denom > start_unit)
+    if straddles.any():
+        round_numbers, leftover, overshoot = _sequential_rounds(fractions, tolerance)
+        # Later straddles shift once the first one opens a new round, so only the first is meaningful.
+        overshoot = int(np.flatnonzero(straddles)[0])
+    else:
+        round_numbers = start_unit.astype(np.int64) + 1
+        leftover = float(Fraction(int(ends[-1] % denom), denom))
+        overshoot = None
+
+    if overshoot is not None:
+        errors.append({
+            "row": overshoot,
+            "message": f"Share fraction {fractions[overshoot]:g} overshoots round {int(round_numbers[overshoot]) - 1}; "
+                       "that round cannot be completed to exactly 1.0.",
+        })
+
+    if leftover:
+        errors.append({"row": None, "message": f"Final round sums to {leftover:.6g}; each round must sum to exactly 1.0."})
+
+    return _build_result(round_numbers, start_date, round_duration, leftover, errors)
+
+def _exact_fill(target, sizes, avail, budget=EXACT_FILL_BUDGET):
+    """
+    Pick counts of each size class (sizes sorted largest first, at most
+    avail[j] of class j) summing exactly to `target`. Largest sizes are
+    tried first; dead-end states are memoized. Returns ({class: count} or
+    None, search nodes used); more than `budget` nodes means the search
+    gave up before finishing.
+    """
+    dead = set()
+    nodes = [0]
+
+    def search(remaining, j):
+        if remaining == 0:
+            return {}
+        if j == len(sizes) or (remaining, j) in dead or nodes[0] > budget:
+            return None
+        nodes[0] += 1
+        for k in range(min(avail[j], remaining // sizes[j]), -1, -1):
+            found = search(remaining - k * sizes[j], j + 1)
+            if found is not None:
+                if k:
+                    found[j] = k
+                return found
+        if nodes[0] <= budget:  # only a fully explored state is a dead end
+            dead.add((remaining, j))
+        return None
+
+    found = search(target, 0)
+    return found, nodes[0]
+
+def pack_fractions_optimal(fractions, start_date, round_duration,
+                           tolerance=FRACTION_TOLERANCE, max_denominator=MAX_DENOMINATOR):
+    """
+    Reorder participants so every round is filled exactly, using as few
+    rounds as the shares allow.
+
+    Shares are read as rationals and scaled to integer units of a common
+    denominator D (one round = D units), then grouped by size. Rounds are
+    built largest-share-first (first-fit-decreasing); each round is
+    completed by an exact subset-sum search over the remaining size
+    classes, and an exact round is stamped out as many times as the counts
+    allow, so thousands of participants cost only a handful of searches.
+
+    When every round fills exactly the result uses sum(fractions) rounds,
+    which is the minimum possible. Otherwise the best-effort packing is
+    returned together with an error explaining why no exact tiling exists.
+    """
+    fractions = np.asarray(fractions, dtype=np.float64).ravel()
+    errors = _validate(fractions, tolerance)
+    if errors:
+        return _empty_result(errors)
+
+    # Shares -> integer units of a common denominator (same rule as pack_fractions)
+    units, denom = _to_units(fractions, tolerance, max_denominator)
+    units = units.astype(object)
+
+    # Size classes, largest first, each holding its participants' row indices
+    sizes = sorted({int(u) for u in units if u > 0}, reverse=True)
+    members = [np.flatnonzero(units == size) for size in sizes]
+    taken = [0] * len(sizes)
+    counts = [len(m) for m in members]
+
+    round_numbers = np.ones(len(fractions), dtype=np.int64)  # zero shares ride along in round 1
+    next_round = 1
+    shortfall = 0
+    exact = True
+    budget_exhausted = False
+    spent = 0
+
+    while any(counts):
+        first = next(j for j, c in enumerate(counts) if c)
+        avail = list(counts)
+        avail[first] -= 1
+        budget = min(EXACT_FILL_BUDGET, EXACT_FILL_TOTAL_BUDGET - spent)
+        if budget > 0:
+            combo, nodes = _exact_fill(denom - sizes[first], sizes, avail, budget)
+            spent += nodes
+            budget_exhausted |= combo is None and nodes > budget
+        else:
+            combo, budget_exhausted = None, True
+
+        if combo is None:
+            # No exact completion for this round: fill it greedily and move on.
+            exact = False
+            need = {first: 1}
+            remaining = denom - sizes[first]
+            for j in range(len(sizes)):
+                if not remaining:
+                    break
+                if not avail[j] or sizes[j] > remaining:
+                    continue
+                k = min(avail[j], remaining // sizes[j])
+                if k:
+                    need[j] = need.get(j, 0) + k
+                    remaining -= k * sizes[j]
+            shortfall += remaining
+            reps = 1
+        else:
+            need = dict(combo)
+            need[first] = need.get(first, 0) + 1
+            reps = min(counts[j] // k for j, k in need.items())
+
+        for j, k in need.items():
+            rows = members[j][taken[j]:taken[j] + k * reps]
+            round_numbers[rows] = np.repeat(np.arange(next_round, next_round + reps), k)
+            taken[j] += k * reps
+            counts[j] -= k * reps
+        next_round += reps
+
+    total = Fraction(int(units.sum()), denom)
+    if not exact:
+        if total.denominator != 1:
+            summary = (f"No exact tiling exists: the shares add up to {float(total):.6g}, "
+                       "which is not a whole number of rounds")
+        elif budget_exhausted:
+            summary = ("No exact tiling was found within the search budget "
+                       f"({EXACT_FILL_BUDGET:,} nodes per round, {EXACT_FILL_TOTAL_BUDGET:,} in total); "
+                       "one may still exist")
+        else:
+            summary = "No exact tiling exists: no combination of the remaining shares completes every round to exactly 1.0"
+        errors.append({
+            "row": None,
+            "message": f"{summary}. At least {-(-total.numerator // total.denominator)} "
+                       f"rounds are needed; the best packing found uses {next_round - 1}.",
+        })
+
+    return _build_result(round_numbers, start_date, round_duration, shortfall / denom if shortfall else 0.0, errors)
+
+# Scheduler modes offered by the group creation pages.
+PACKING_MODES = {
+    "Spreadsheet order": pack_fractions,
+    "Minimise rounds": pack_fractions_optimal,
+}
@@ -0,0 +1,98 @@
+# page_registry.py
+"""
+Page name -> (module, function, roles) registry.
+
+Page modules are imported the first time their page is opened, so a
+rerun only pays for pandas/plotly/st_aggrid/openpyxl when the selected
+page actually needs them. Import cost of each page is recorded when it
+is first loaded; `python page_registry.py` measures cold imports of
+every page in fresh interpreters.
+"""
+
+import importlib
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import namedtuple
+
+PageSpec = namedtuple("PageSpec", ["module", "function", "roles"])
+
+ALL_ROLES = ("user", "participant", "admin")
+
+# Sidebar order.
+PAGES = {
+    "Overview": PageSpec("overview", "overview", ALL_ROLES),
+    "Add Group": PageSpec("addgroup", "add_group", ("admin",)),
+    "Edit": PageSpec("edit", "edit", ("admin",)),
+    "Tracking": PageSpec("tracking", "tracking", ("admin",)),
+    "Visualization": PageSpec("visualization", "visualization", ("participant", "admin")),
+    "Export": PageSpec("export", "export", ("admin",)),
+    "Settings": PageSpec("settings", "settings", ("admin",)),
+    "Admin Panel": PageSpec("admin", "admin_panel", ("admin",)),
+    "Performance": PageSpec("performance", "performance", ("admin",)),
+}
+
+# page name -> seconds spent importing its module (first load in this process)
+_import_times = {}
+
+def normalize_role(role):
+    """
+    Roles without pages of their own (unknown or missing) get the "user"
+    pages; used for both the sidebar and the access check so they agree.
+    """
+    return role if role in ALL_ROLES else "user"
+
+def pages_for_role(role):
+    return [name for name, spec in PAGES.items() if role in spec.roles]
+
+def can_access(page, role):
+    return page in PAGES and role in PAGES[page].roles
+
+def get_page(page):
+    """
+    Return the page's render function, importing its module on first use.
+    """
+    spec = PAGES[page]
+    if page not in _import_times:
+        started = time.perf_counter()
+        module = importlib.import_module(spec.module)
+        _import_times[page] = time.perf_counter() - started
+    else:
+        module = sys.modules[spec.module]
+    return getattr(module, spec.function)
+
+def import_report():
+    """
+    Import cost of every page loaded so far in this process. A page whose
+    heavy dependencies were already pulled in by another page shows a
+    near-zero time; use measure_cold_imports() for isolated numbers.
+    """
+    return [
+        {"page": page, "module": spec.module, "loaded": page in _import_times,
+         "import_ms": round(1000 * _import_times[page], 1) if page in _import_times else None}
+        for page, spec in PAGES.items()
+    ]
+
+def measure_cold_imports(python=sys.executable):
+    """
+    Import each page module in a fresh interpreter and time it, so shared
+    dependencies are charged to every page that needs them.
+    """
+    results = []
+    for page, spec in PAGES.items():
+        code = (
+            "import time, streamlit; t = time.perf_counter(); "
+            f"import {spec.module}; print(time.perf_counter() - t)"
+        )
+        proc = subprocess.run([python, "-c", code], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)))
+        if proc.returncode == 0:
+            results.append({"page": page, "module": spec.module, "import_ms": round(1000 * float(proc.stdout.split()[-1]), 1)})
+        else:
+            results.append({"page": page, "module": spec.module, "error": proc.stderr.strip().splitlines()[-1]})
+    return results
+
+if __name__ == "__main__":
+    print(json.dumps(measure_cold_imports(), indent=2))
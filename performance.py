@@ -0,0 +1,50 @@
+# performance.py
+import streamlit as st
+import pandas as pd
+from db_handler import get_query_stats, pool_stats, cache_stats
+from page_registry import import_report
+
+def performance():
+    """
+    Admin-only view of the db_handler instrumentation: per-page query
+    counts and latency percentiles, recent reruns, the slow-query log,
+    connection pool / query cache counters and page import costs.
+    """
+    st.title("⏱️ Performance")
+
+    stats = get_query_stats()
+
+    c1, c2 = st.columns([4, 1])
+    c1.caption(f"Slow-query threshold: {stats.slow_query_ms:.0f} ms (neon.slow_query_ms)")
+    if c2.button("Reset statistics"):
+        stats.reset()
+        st.rerun()
+
+    st.subheader("Per page")
+    summary = stats.page_summary()
+    if summary:
+        st.dataframe(pd.DataFrame(summary), hide_index=True, use_container_width=True)
+    else:
+        st.info("No queries recorded yet.")
+
+    st.subheader("Recent reruns")
+    st.dataframe(pd.DataFrame(stats.recent_reruns()), hide_index=True, use_container_width=True)
+
+    st.subheader("Slow-query log")
+    slow = stats.slow_queries()
+    if slow:
+        st.dataframe(pd.DataFrame(slow), hide_index=True, use_container_width=True)
+    else:
+        st.info("No statements over the threshold.")
+
+    st.subheader("Connection pool & query cache")
+    p1, p2 = st.columns(2)
+    with p1:
+        st.write("**Pool**")
+        st.json(pool_stats())
+    with p2:
+        st.write("**Query cache**")
+        st.json(cache_stats())
+
+    st.subheader("Page import cost (this process)")
+    st.dataframe(pd.DataFrame(import_report()), hide_index=True, use_container_width=True)
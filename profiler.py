@@ -0,0 +1,162 @@
+# profiler.py
+"""
+Admin-only render profiler for a single page rerun.
+
+Two modes:
+  - "cProfile": deterministic per-function call counts and times
+    (higher overhead), plus stack samples taken alongside.
+  - "Sampling": a background thread samples the script thread's stack
+    every SAMPLE_INTERVAL seconds (low overhead).
+
+Both save collapsed stacks ("frame;frame;frame count" per line) that
+flamegraph.pl, speedscope or inferno can render, and cProfile mode also
+saves a .prof file loadable with pstats/snakeviz.
+"""
+
+import cProfile
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+import streamlit as st
+
+PROFILE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "profiles")
+PROFILE_MODES = ["cProfile", "Sampling"]
+SAMPLE_INTERVAL = 0.005  # seconds between stack samples
+TOP_FUNCTIONS = 40       # rows in the per-function breakdown
+PROFILE_KEEP = 100       # newest files kept in PROFILE_DIR; older ones are pruned
+
+class StackSampler(threading.Thread):
+    """
+    Samples one thread's Python stack at a fixed interval into a Counter of
+    root-to-leaf frame tuples.
+    """
+
+    def __init__(self, thread_id, interval=SAMPLE_INTERVAL):
+        super().__init__(name="quraa-profiler", daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            if stack:
+                self.samples[tuple(reversed(stack))] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+    def collapsed(self):
+        return "\n".join(f"{';'.join(stack)} {count}" for stack, count in self.samples.most_common())
+
+    def self_time(self):
+        """
+        Samples per leaf function (where time was actually spent).
+        """
+        leaves = Counter()
+        for stack, count in self.samples.items():
+            leaves[stack[-1]] += count
+        total = sum(leaves.values()) or 1
+        return [
+            {"function": fn, "samples": n, "share %": round(100.0 * n / total, 1)}
+            for fn, n in leaves.most_common(TOP_FUNCTIONS)
+        ]
+
+def _cprofile_rows(profile):
+    stats = pstats.Stats(profile)
+    rows = []
+    for (filename, line, func), (cc, nc, tottime, cumtime, _) in stats.stats.items():
+        rows.append({
+            "function": f"{os.path.basename(filename)}:{line}({func})",
+            "calls": nc,
+            "tottime ms": round(1000 * tottime, 2),
+            "cumtime ms": round(1000 * cumtime, 2),
+        })
+    rows.sort(key=lambda r: r["cumtime ms"], reverse=True)
+    return rows[:TOP_FUNCTIONS]
+
+def _prune_profiles():
+    """
+    Delete all but the newest PROFILE_KEEP files (names start with a timestamp).
+    """
+    names = sorted(os.listdir(PROFILE_DIR), reverse=True)
+    for name in names[PROFILE_KEEP:]:
+        try:
+            os.remove(os.path.join(PROFILE_DIR, name))
+        except OSError:
+            pass  # already removed by another session
+
+def profile_call(fn, label, mode="Sampling"):
+    """
+    Run fn() under the chosen profiler and return a report dict:
+      {"label", "mode", "wall_ms", "functions", "collapsed_path", "prof_path", "interrupted"}
+    The report is produced even if fn() stops the script (st.stop, st.rerun)
+    or raises; it is also kept in st.session_state["last_profile"] so the
+    next run can show a report this run never got to render.
+    """
+    sampler = StackSampler(threading.get_ident())
+    profile = cProfile.Profile() if mode == "cProfile" else None
+    report = {"label": label, "mode": mode}
+
+    started = time.perf_counter()
+    sampler.start()
+    if profile:
+        profile.enable()
+    try:
+        fn()
+    finally:
+        if profile:
+            profile.disable()
+        sampler.stop()
+        report["wall_ms"] = round(1000 * (time.perf_counter() - started), 1)
+        report["interrupted"] = sys.exc_info()[0] is not None
+
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        safe_label = re.sub(r"\W+", "_", label)
+        stem = os.path.join(PROFILE_DIR, f"{datetime.now():%Y%m%d-%H%M%S-%f}-{safe_label}")
+        report["collapsed_path"] = stem + ".collapsed.txt"
+        with open(report["collapsed_path"], "w") as f:
+            f.write(sampler.collapsed())
+
+        if profile:
+            report["prof_path"] = stem + ".prof"
+            profile.dump_stats(report["prof_path"])
+            report["functions"] = _cprofile_rows(profile)
+        else:
+            report["prof_path"] = None
+            report["functions"] = sampler.self_time()
+        _prune_profiles()
+        st.session_state["last_profile"] = report
+    return report
+
+def profiling_controls():
+    """
+    Sidebar switch (admins only). Returns the selected mode, or None when off.
+    """
+    st.sidebar.markdown("---")
+    if not st.sidebar.toggle("Profile page render", key="profiling_enabled"):
+        return None
+    return st.sidebar.radio("Profiler", PROFILE_MODES, key="profiling_mode", horizontal=True)
+
+def render_profile_report(report):
+    ended = ", ended early by st.rerun/st.stop or an error" if report["interrupted"] else ""
+    with st.expander(f"⏱️ Profile: {report['label']} — {report['wall_ms']} ms ({report['mode']}{ended})"):
+        st.dataframe(report["functions"], hide_index=True, use_container_width=True)
+        if os.path.exists(report["collapsed_path"]):
+            with open(report["collapsed_path"]) as f:
+                st.download_button("Download collapsed stacks (flamegraph)", f.read(),
+                                   file_name=os.path.basename(report["collapsed_path"]))
+        st.caption(f"Saved to {report['collapsed_path']}" + (f" and {report['prof_path']}" if report["prof_path"] else ""))
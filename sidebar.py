@@ -1,4 +1,5 @@
 import streamlit as st
+from page_registry import pages_for_role
 
 def get_notifications():
     """
@@ -28,19 +29,12 @@ def clear_notifications():
 def render_sidebar(role="user"):
     """
     Renders the sidebar with navigation and notification features.
-    The visible pages depend on the user's role.
+    The visible pages depend on the user's role (see page_registry.normalize_role).
     """
     st.sidebar.title("Quraa Management")
 
-    # Pages based on user role
-    if role == "admin":
-        available_pages = [
-            "Overview", "Add Group", "Edit", "Tracking", "Visualization", "Settings", "Admin Panel"
-        ]
-    elif role == "participant":
-        available_pages = ["Overview", "Visualization"]
-    else:  # default role: user
-        available_pages = ["Overview"]
+    # Pages based on user role (see page_registry.PAGES)
+    available_pages = pages_for_role(role)
 
     # Navigation
     page = st.sidebar.radio("Navigate", available_pages)
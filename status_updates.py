@@ -0,0 +1,74 @@
+# status_updates.py
+"""
+Set-based status changes for contributions (paid) and receivables (received).
+
+Each call is ONE UPDATE in one transaction, whatever the number of
+participants or rounds, and returns exactly the rows it changed so the
+UI can report accurate counts. Rows already marked are never touched.
+"""
+
+from datetime import date
+
+from db_handler import get_connection, invalidate_tables
+
+_TARGETS = {
+    "paid": {"table": "contributions", "flag": "paid_yesno", "date_col": "paid_date"},
+    "received": {"table": "receivables", "flag": "received_yesno", "date_col": "received_date"},
+}
+
+def _mark(target, group_id, participant_ids=None, round_numbers=None, up_to_date=None, on_date=None, extra_where=()):
+    cfg = _TARGETS[target]
+    where = ["t.group_id = %(group_id)s", f"t.{cfg['flag']} = 'No'"]
+    params = {"group_id": group_id, "on_date": on_date or date.today()}
+
+    if participant_ids is not None:
+        where.append("t.participant_id = ANY(%(participant_ids)s)")
+        params["participant_ids"] = [int(pid) for pid in participant_ids]
+    if round_numbers is not None:
+        where.append("t.round_number = ANY(%(round_numbers)s)")
+        params["round_numbers"] = [int(r) for r in round_numbers]
+    if up_to_date is not None:
+        where.append("""t.round_number IN (
+            SELECT round_number FROM rounds
+             WHERE group_id = %(group_id)s AND round_date <= %(up_to_date)s)""")
+        params["up_to_date"] = up_to_date
+    where.extend(extra_where)
+
+    sql = f"""
+    UPDATE {cfg["table"]} t
+       SET {cfg["flag"]} = 'Yes', {cfg["date_col"]} = %(on_date)s
+     WHERE {' AND '.join(where)}
+    RETURNING t.participant_id, t.round_number
+    """
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(sql, params)
+            changed = [{"participant_id": pid, "round_number": rnd} for pid, rnd in cur.fetchall()]
+    if changed:
+        invalidate_tables(cfg["table"])
+    return changed
+
+def mark_paid(group_id, participant_ids=None, round_numbers=None, up_to_date=None, paid_date=None):
+    """
+    Mark unpaid contributions of a group as paid.
+      participant_ids: only these participants (None = everyone)
+      round_numbers:   only these rounds (None = every round)
+      up_to_date:      only rounds dated on or before this date
+    Filters combine, e.g. round_numbers=[3] alone marks the whole of round 3.
+    Returns [{"participant_id", "round_number"}] for every row changed.
+    """
+    return _mark("paid", group_id, participant_ids, round_numbers, up_to_date, paid_date)
+
+def mark_received(group_id, participant_ids=None, round_numbers=None, up_to_date=None, received_date=None):
+    """
+    Mark receivables of a group as received; same filters as mark_paid().
+    A participant who already received in another round of the group is
+    skipped, matching the rule enforced by the Receivables tab.
+    """
+    already_received = """NOT EXISTS (
+        SELECT 1 FROM receivables o
+         WHERE o.group_id = t.group_id
+           AND o.participant_id = t.participant_id
+           AND o.received_yesno = 'Yes')"""
+    return _mark("received", group_id, participant_ids, round_numbers, up_to_date, received_date,
+                 extra_where=(already_received,))
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from packing import PACKING_MODES, pack_fractions, pack_fractions_optimal
+
+START = "2025-01-01"
+
+@pytest.mark.parametrize("mode", list(PACKING_MODES))
+@pytest.mark.parametrize("share, per_round", [(0.1, 10), (1 / 3, 3), (0.2, 5), (0.05, 20), (0.25, 4)])
+def test_uniform_shares_tile_exactly(mode, share, per_round):
+    # Large enough that a float cumsum drifts across round boundaries
+    n = 30_000 - 30_000 % per_round
+    result = PACKING_MODES[mode](np.full(n, share), START, "monthly")
+    assert result.ok, result.errors[:1]
+    assert result.total_rounds == n // per_round
+    assert result.leftover == 0.0
+    assert np.bincount(result.round_numbers)[1:].tolist() == [per_round] * (n // per_round)
+
+def test_overshoot_reports_first_straddling_row():
+    result = pack_fractions([0.5, 0.3, 0.6, 0.4, 0.5, 0.5], START, "monthly")
+    assert [e["row"] for e in result.errors] == [2]
+    assert "overshoots round 1" in result.errors[0]["message"]
+
+def test_leftover_is_reported():
+    result = pack_fractions([0.5, 0.5, 0.25, 0.5], START, "monthly")
+    assert result.leftover == pytest.approx(0.75)
+    assert result.total_rounds == 2
+    assert [e["row"] for e in result.errors] == [None]
+    assert "0.75" in result.errors[0]["message"]
+
+def test_optimal_reorders_to_fill_rounds():
+    result = pack_fractions_optimal([0.5, 0.3, 0.6, 0.4, 0.5, 0.7], START, "weekly")
+    assert result.ok
+    assert result.total_rounds == 3
+    sums = np.bincount(result.round_numbers, weights=[0.5, 0.3, 0.6, 0.4, 0.5, 0.7])[1:]
+    assert np.allclose(sums, 1.0)
+    assert (np.diff(result.schedule) == np.timedelta64(7, "D")).all()
+
+@pytest.mark.parametrize("shares", [
+    [0.1234, 0.8766],
+    [0.3335, 0.6665],
+    [1 / 3, 1 / 3, 1 / 3],
+    [0.125, 0.375, 0.5],
+])
+def test_modes_accept_the_same_exact_shares(shares):
+    for mode, pack in PACKING_MODES.items():
+        result = pack(shares, START, "monthly")
+        assert result.ok, (mode, result.errors)
+        assert result.total_rounds == 1, mode
+
+def test_modes_agree_on_shares_that_do_not_tile():
+    shares = [0.3, 0.3, 0.3]
+    for mode, pack in PACKING_MODES.items():
+        result = pack(shares, START, "monthly")
+        assert not result.ok, mode
+
+@pytest.mark.parametrize("mode", list(PACKING_MODES))
+def test_invalid_fraction_is_reported_per_row(mode):
+    result = PACKING_MODES[mode]([0.5, float("nan"), 1.5], START, "monthly")
+    assert [e["row"] for e in result.errors] == [1, 2]
@@ -1,7 +1,8 @@
 import streamlit as st
-import pandas as pd
 from datetime import datetime
-from db_handler import run_query, run_command
+from db_handler import run_query_df, run_queries, stats_fragment, DEFAULT_CACHE_TTL
+from status_updates import mark_paid, mark_received
+from group_ledger import load_ledger
 
 def tracking():
     """
@@ -12,272 +13,294 @@ def tracking():
 
     st.title("Tracking: Payments & Receivables")
 
-    # 1) Alerts Section
-    alerts_for_unpaid()
-    alerts_for_unreceived()
+    # Each section below is a fragment: interacting with one reruns only
+    # that section's queries, not the alerts and both tabs together.
+    if "tracking_flash" in st.session_state:
+        st.success(st.session_state.pop("tracking_flash"))
+
+    # Fetch every section's data in one concurrent batch, so a full rerun
+    # costs one round trip of latency instead of three in a row. The
+    # results are handed to the fragments, which reuse them on their own
+    # reruns (a write always triggers a full rerun, see _report_changes).
+    today = datetime.now().date()
+    data = run_queries({
+        "unpaid": _alert_summary_query("unpaid", today),
+        "unreceived": _alert_summary_query("unreceived", today),
+        "groups": (GROUP_LIST_SQL, None),
+    }, ttl=DEFAULT_CACHE_TTL, as_frame=True)
+
+    # 1) Alerts Section (one summary query each; per-group details on demand)
+    render_alerts("unpaid", data["unpaid"], today)
+    render_alerts("unreceived", data["unreceived"], today)
 
     # 2) Payment & Receivable Tabs
     tab_payments, tab_receivables = st.tabs(["Payments", "Receivables"])
 
     with tab_payments:
-        payments_tab()
+        tracking_tab("Payments", data["groups"])
 
     with tab_receivables:
-        receivables_tab()
+        tracking_tab("Receivables", data["groups"])
 
 # ─────────────────────────────────────────────────────────
-# ALERTS FOR UNPAID CONTRIBUTIONS
+# ALERTS (shared by unpaid contributions & unreceived rounds)
 # ─────────────────────────────────────────────────────────
-def alerts_for_unpaid():
-    st.subheader("Alerts for Unpaid Contributions")
-
-    # We'll define "unpaid" as "paid_yesno='No'" in 'contributions'
-    # and round_date <= today in 'rounds'.
-    current_date = datetime.now().date()
-
-    sql_unpaid = """
-    SELECT g.group_name,
-           p.participant_name,
-           c.round_number,
-           r.round_date
-      FROM contributions c
-      JOIN participants p ON c.participant_id = p.participant_id
-      JOIN groups g ON c.group_id = g.group_id
-      JOIN rounds r ON (r.group_id = c.group_id AND r.round_number = c.round_number)
-     WHERE c.paid_yesno = 'No'
-       AND r.round_date <= %s
-     ORDER BY g.group_name, c.round_number, p.participant_name
+
+# Groups listed by default in each alert section (largest backlog first).
+ALERT_TOP_N = 10
+
+ALERT_KINDS = {
+    "unpaid": {
+        "table": "contributions",
+        "flag": "paid_yesno",
+        "title": "Alerts for Unpaid Contributions",
+        "all_clear": "All participants are up to date with their contributions.",
+        "noun": "unpaid contributions",
+        "banner": st.warning,
+    },
+    "unreceived": {
+        "table": "receivables",
+        "flag": "received_yesno",
+        "title": "Alerts for Unreceived Rounds",
+        "all_clear": "All rounds have been received by participants.",
+        "noun": "unreceived payouts",
+        "banner": st.error,
+    },
+}
+
+def _alert_summary_query(kind, as_of):
+    cfg = ALERT_KINDS[kind]
+    sql = f"""
+    WITH due AS (
+        SELECT DISTINCT group_id, round_number, round_date
+          FROM rounds
+         WHERE round_date <= %s
+    )
+    SELECT g.group_id,
+           g.group_name,
+           t.round_number,
+           due.round_date,
+           COUNT(*) AS open_count
+      FROM {cfg["table"]} t
+      JOIN due ON (due.group_id = t.group_id AND due.round_number = t.round_number)
+      JOIN groups g ON g.group_id = t.group_id
+     WHERE t.{cfg["flag"]} = 'No'
+     GROUP BY g.group_id, g.group_name, t.round_number, due.round_date
+     ORDER BY g.group_name, t.round_number
     """
-    rows = run_query(sql_unpaid, (current_date,))
-    if not rows:
-        st.info("All participants are up to date with their contributions.")
-    else:
-        df = pd.DataFrame(rows, columns=["Group Name", "Participant Name", "Round Number", "Round Date"])
-        for gname in df["Group Name"].unique():
-            sub = df[df["Group Name"] == gname]
-            st.warning(f"**Group: {gname}** - Unpaid participants for past rounds:")
-            st.dataframe(sub[["Participant Name", "Round Number", "Round Date"]])
+    return sql, (as_of,)
 
-# ─────────────────────────────────────────────────────────
-# ALERTS FOR UNRECEIVED
-# ─────────────────────────────────────────────────────────
-def alerts_for_unreceived():
-    st.subheader("Alerts for Unreceived Rounds")
-
-    current_date = datetime.now().date()
-
-    sql_unreceived = """
-    SELECT g.group_name,
-           p.participant_name,
-           rcv.round_number,
-           rd.round_date
-      FROM receivables rcv
-      JOIN participants p ON rcv.participant_id = p.participant_id
-      JOIN groups g ON rcv.group_id = g.group_id
-      JOIN rounds rd ON (rd.group_id = rcv.group_id AND rd.round_number = rcv.round_number)
-     WHERE rcv.received_yesno = 'No'
-       AND rd.round_date <= %s
-     ORDER BY g.group_name, rcv.round_number, p.participant_name
+def fetch_alert_summary(kind, as_of):
     """
-    rows = run_query(sql_unreceived, (current_date,))
-    if not rows:
-        st.info("All rounds have been received by participants.")
-    else:
-        df = pd.DataFrame(rows, columns=["Group Name", "Participant Name", "Round Number", "Round Date"])
-        for gname in df["Group Name"].unique():
-            gsub = df[df["Group Name"] == gname]
-            for rnd in sorted(gsub["Round Number"].unique()):
-                sub2 = gsub[gsub["Round Number"] == rnd]
-                round_date = sub2["Round Date"].iloc[0]
-                parts = sub2["Participant Name"].unique().tolist()
-                st.error(f"**Group: {gname}**, Round {rnd} (on {round_date}) not received by: {parts}")
+    One row per overdue (group, round) with the number of open items,
+    counted in SQL instead of shipping every overdue participant row.
+    """
+    return run_query_df(*_alert_summary_query(kind, as_of), ttl=DEFAULT_CACHE_TTL)
+
+def fetch_alert_participants(kind, group_id, as_of):
+    """
+    Drill-down rows for a single group (only fetched when asked for).
+    """
+    cfg = ALERT_KINDS[kind]
+    sql = f"""
+    SELECT p.participant_name,
+           t.round_number,
+           due.round_date
+      FROM {cfg["table"]} t
+      JOIN participants p ON t.participant_id = p.participant_id
+      JOIN (SELECT DISTINCT group_id, round_number, round_date
+              FROM rounds
+             WHERE group_id = %s AND round_date <= %s) due
+        ON (due.group_id = t.group_id AND due.round_number = t.round_number)
+     WHERE t.group_id = %s
+       AND t.{cfg["flag"]} = 'No'
+     ORDER BY t.round_number, p.participant_name
+    """
+    return run_query_df(sql, (group_id, as_of, group_id))
+
+@stats_fragment
+def render_alerts(kind, by_round, current_date):
+    """
+    Fragment over the summary rows fetched by tracking(): toggling "show
+    all" or a drill-down checkbox reruns only this alert section (the
+    drill-down is per group).
+    """
+    cfg = ALERT_KINDS[kind]
+    st.subheader(cfg["title"])
+
+    if by_round.empty:
+        st.info(cfg["all_clear"])
+        return
+
+    by_group = (
+        by_round.groupby(["group_id", "group_name"], sort=False)
+        .agg(open_count=("open_count", "sum"), rounds=("round_number", "count"), oldest=("round_date", "min"))
+        .reset_index()
+        .sort_values(["open_count", "oldest"], ascending=[False, True])
+    )
+
+    cfg["banner"](
+        f"{int(by_group['open_count'].sum())} {cfg['noun']} across {len(by_group)} group(s) for rounds on or before {current_date}."
+    )
+
+    shown = by_group
+    if len(by_group) > ALERT_TOP_N:
+        if not st.toggle(f"Show all {len(by_group)} groups", key=f"alerts_{kind}_all"):
+            shown = by_group.head(ALERT_TOP_N)
+
+    for grp in shown.itertuples(index=False):
+        label = (f"**{grp.group_name}** — {grp.open_count} {cfg['noun']} in "
+                 f"{grp.rounds} round(s), oldest {grp.oldest:%Y-%m-%d}")
+        with st.expander(label):
+            rounds_df = by_round[by_round["group_id"] == grp.group_id]
+            st.dataframe(
+                rounds_df[["round_number", "round_date", "open_count"]].rename(columns={
+                    "round_number": "Round Number", "round_date": "Round Date", "open_count": "Open Items"
+                }),
+                hide_index=True,
+                column_config={"Round Date": st.column_config.DateColumn(format="YYYY-MM-DD")},
+            )
+            if st.checkbox("Show participants", key=f"alerts_{kind}_{grp.group_id}"):
+                detail = fetch_alert_participants(kind, int(grp.group_id), current_date)
+                st.dataframe(
+                    detail.rename(columns={
+                        "participant_name": "Participant Name", "round_number": "Round Number", "round_date": "Round Date"
+                    }),
+                    hide_index=True,
+                    column_config={"Round Date": st.column_config.DateColumn(format="YYYY-MM-DD")},
+                )
 
 # ─────────────────────────────────────────────────────────
 # PAYMENTS TAB
 # ─────────────────────────────────────────────────────────
-def payments_tab():
-    st.subheader("Mark Payments")
-
-    # 1) Choose group
-    group_sql = "SELECT group_id, group_name FROM groups ORDER BY group_name;"
-    group_rows = run_query(group_sql)
-    if not group_rows:
-        st.info("No groups found.")
-        return
+GROUP_LIST_SQL = "SELECT group_id, group_name FROM groups ORDER BY group_name;"
 
-    # Convert to dict for selection
-    id_to_name = {int(gid): gname for (gid, gname) in group_rows}
-    name_to_id = {gname: int(gid) for (gid, gname) in group_rows}
-    group_names = [row[1] for row in group_rows]
+def _select_group_and_round(label, empty_msg, group_rows):
+    """
+    Shared group + round pickers for both tabs. Returns (group_id, group_name, round) or None.
+    """
+    if group_rows.empty:
+        st.info(empty_msg)
+        return None
 
-    selected_group_name = st.selectbox("Select Group (Payments)", group_names)
+    name_to_id = dict(zip(group_rows["group_name"], group_rows["group_id"].astype(int).tolist()))
+    selected_group_name = st.selectbox(f"Select Group ({label})", list(name_to_id), key=f"tracking_{label.lower()}_group")
     if not selected_group_name:
-        return
-    group_id = int(name_to_id[selected_group_name])
+        return None
+    group_id = name_to_id[selected_group_name]
 
-    # 2) Choose round
     round_sql = """
-    SELECT round_number
+    SELECT round_number, MIN(round_date) AS round_date
       FROM rounds
      WHERE group_id = %s
+     GROUP BY round_number
      ORDER BY round_number
     """
-    rrows = run_query(round_sql, (group_id,))
-    if not rrows:
+    rrows = run_query_df(round_sql, (group_id,), ttl=DEFAULT_CACHE_TTL)
+    if rrows.empty:
         st.info(f"No rounds found for group '{selected_group_name}'.")
-        return
-    # ensure Python int
-    round_numbers = [int(r[0]) for r in rrows]
-    selected_round = st.selectbox("Select Round (Payments)", round_numbers)
+        return None
+    round_numbers = rrows["round_number"].astype(int).tolist()
+    selected_round = st.selectbox(f"Select Round ({label})", round_numbers, key=f"tracking_{label.lower()}_round")
+    return group_id, selected_group_name, selected_round
 
-    # 3) Show participants who haven't paid
-    pay_sql = """
-    SELECT p.participant_name,
-           c.paid_yesno,
-           c.participant_id
-      FROM contributions c
-      JOIN participants p ON c.participant_id = p.participant_id
-     WHERE c.group_id = %s
-       AND c.round_number = %s
-     ORDER BY p.participant_name
+def _names_by_id(ledger, participant_ids):
     """
-    pay_rows = run_query(pay_sql, (group_id, selected_round))
-    if not pay_rows:
-        st.info("No participants found for this round.")
-        return
+    {participant_id: name} ordered by name, for the multiselects.
+    """
+    names = {int(pid): ledger.name_of(int(pid)) for pid in participant_ids}
+    return dict(sorted(names.items(), key=lambda item: (item[1], item[0])))
+
+def _report_changes(changed, verb):
+    if changed:
+        rounds = sorted({c["round_number"] for c in changed})
+        people = len({c["participant_id"] for c in changed})
+        # A write makes the alerts above stale: rerun the whole page once
+        # and show the confirmation after it.
+        st.session_state["tracking_flash"] = (
+            f"Marked {len(changed)} row(s) as {verb}: {people} participant(s) in round(s) {rounds}."
+        )
+        st.rerun()
+    else:
+        st.info("No matching rows were updated.")
+
+@stats_fragment
+def tracking_tab(label, group_rows):
+    """
+    Fragment for one tab: picking a group/round or participants reruns only
+    this tab, not the alerts or the other tab.
+    """
+    title, empty_msg, body = TRACKING_TABS[label]
+    st.subheader(title)
+    picked = _select_group_and_round(label, empty_msg, group_rows)
+    if picked:
+        body(*picked)
 
-    df = pd.DataFrame(pay_rows, columns=["Participant Name", "PaidYesNo", "participant_id"])
-    not_paid_df = df[df["PaidYesNo"] == "No"]
-    if not_paid_df.empty:
+def payments_tab(group_id, selected_group_name, selected_round):
+    """
+    Payments tab body for the group/round picked above it.
+    """
+    # 1) Show participants who haven't paid (from the cached per-group ledger)
+    ledger = load_ledger(group_id, ttl=DEFAULT_CACHE_TTL)
+    unpaid = _names_by_id(ledger, ledger.unpaid_in_round(selected_round))
+    if not unpaid:
         st.info("All participants have paid in this round.")
-        return
     else:
         st.write("Participants who haven't paid yet:")
-        unpaid_list = not_paid_df["Participant Name"].unique().tolist()
-        pay_multi = st.multiselect("Select participants to mark as paid:", unpaid_list)
+        pay_multi = st.multiselect("Select participants to mark as paid:", list(unpaid), format_func=unpaid.get)
 
         if st.button("Confirm Payment"):
             if not pay_multi:
                 st.info("No participants selected.")
             else:
-                updated_any = False
-                for pname in pay_multi:
-                    row_ = df[df["Participant Name"] == pname]
-                    if not row_.empty:
-                        pid_ = int(row_["participant_id"].iloc[0])  # cast to Python int
-                        update_sql = """
-                        UPDATE contributions
-                           SET paid_yesno='Yes', paid_date=%s
-                         WHERE group_id=%s
-                           AND round_number=%s
-                           AND participant_id=%s
-                           AND paid_yesno='No'
-                        """
-                        run_command(update_sql, (datetime.now().date(), group_id, selected_round, pid_))
-                        updated_any = True
-
-                if updated_any:
-                    st.success("Marked selected participants as paid!")
-                else:
-                    st.info("No matching rows were updated.")
+                _report_changes(mark_paid(group_id, pay_multi, round_numbers=[selected_round]), "paid")
+
+    # 2) Whole-round / catch-up actions (one UPDATE each)
+    with st.expander("Bulk actions"):
+        up_to = st.date_input("Mark every round due on or before", datetime.now().date(), key="pay_up_to")
+        bulk_actions = {
+            "Mark everyone paid for the selected round": (
+                f"every participant of '{selected_group_name}' as paid for round {selected_round}",
+                {"round_numbers": [selected_round]},
+            ),
+            "Mark all rounds due on or before that date paid": (
+                f"every participant of '{selected_group_name}' as paid for every round due on or before {up_to}",
+                {"up_to_date": up_to},
+            ),
+        }
+        action = st.selectbox("Bulk action", ["Cancel", *bulk_actions], key="pay_bulk_action")
+        if action != "Cancel":
+            description, filters = bulk_actions[action]
+            st.error(f"This marks {description}. Click below to confirm.")
+            if st.button("Confirm Bulk Payment"):
+                _report_changes(mark_paid(group_id, **filters), "paid")
 
 # ─────────────────────────────────────────────────────────
 # RECEIVABLES TAB
 # ─────────────────────────────────────────────────────────
-def receivables_tab():
-    st.subheader("Mark Receivables")
-
-    # 1) Choose group
-    group_sql = "SELECT group_id, group_name FROM groups ORDER BY group_name;"
-    group_rows = run_query(group_sql)
-    if not group_rows:
-        st.info("No groups found for receivables.")
-        return
-
-    name_to_id = {gname: int(gid) for (gid, gname) in group_rows}
-    group_names = [row[1] for row in group_rows]
-    selected_group_name = st.selectbox("Select Group (Receivables)", group_names)
-    if not selected_group_name:
-        return
-    group_id = int(name_to_id[selected_group_name])
-
-    # 2) Choose round
-    round_sql = """
-    SELECT round_number
-      FROM rounds
-     WHERE group_id=%s
-     ORDER BY round_number
+def receivables_tab(group_id, selected_group_name, selected_round):
     """
-    rrows = run_query(round_sql, (group_id,))
-    if not rrows:
-        st.info(f"No rounds found for group '{selected_group_name}'.")
-        return
-
-    round_nums = [int(r[0]) for r in rrows]
-    selected_round = st.selectbox("Select Round (Receivables)", round_nums)
-
-    # 3) Show who hasn't received for that round
-    rec_sql = """
-    SELECT p.participant_name,
-           r.received_yesno,
-           r.participant_id
-      FROM receivables r
-      JOIN participants p ON r.participant_id = p.participant_id
-     WHERE r.group_id = %s
-       AND r.round_number = %s
-     ORDER BY p.participant_name
+    Receivables tab body for the group/round picked above it.
     """
-    rec_rows = run_query(rec_sql, (group_id, selected_round))
-    if not rec_rows:
-        st.info(f"No participants found for Group={selected_group_name}, Round={selected_round}.")
+    # 1) Who hasn't received for that round, excluding anyone who already
+    #    received in another round of this group
+    ledger = load_ledger(group_id, ttl=DEFAULT_CACHE_TTL)
+    possible = _names_by_id(ledger, ledger.eligible_receivers(selected_round))
+    if not possible:
+        st.info("No participants can receive now; either they've already received or no partial data.")
         return
 
-    df = pd.DataFrame(rec_rows, columns=["Participant Name", "ReceivedYesNo", "participant_id"])
-    not_received_df = df[df["ReceivedYesNo"] == "No"]
-    if not_received_df.empty:
-        st.info("All participants have received for this round.")
-        return
-    else:
-        # Also block participants who have already received in any other round of this group
-        block_sql = """
-        SELECT r.participant_id
-          FROM receivables r
-         WHERE r.group_id = %s
-           AND r.received_yesno='Yes'
-        """
-        block_rows = run_query(block_sql, (group_id,))
-        already_received_ids = set(int(row[0]) for row in block_rows)
-
-        can_receive_df = not_received_df[~not_received_df["participant_id"].isin(already_received_ids)]
-        if can_receive_df.empty:
-            st.info("No participants can receive now; either they've already received or no partial data.")
-            return
+    st.write("Participants who haven't received in this round and haven't received in any other round:")
+    rec_sel = st.multiselect("Select participants to mark as received:", list(possible), format_func=possible.get)
+
+    if st.button("Confirm Receivables"):
+        if not rec_sel:
+            st.info("No participants selected.")
         else:
-            st.write("Participants who haven't received in this round and haven't received in any other round:")
-            possible_names = can_receive_df["Participant Name"].unique().tolist()
-            rec_sel = st.multiselect("Select participants to mark as received:", possible_names)
-
-            if st.button("Confirm Receivables"):
-                if not rec_sel:
-                    st.info("No participants selected.")
-                else:
-                    updated_recv = False
-                    for pname in rec_sel:
-                        row_ = can_receive_df[can_receive_df["Participant Name"] == pname]
-                        if not row_.empty:
-                            pid_ = int(row_["participant_id"].iloc[0])  # cast to Python int
-                            update_sql = """
-                            UPDATE receivables
-                               SET received_yesno='Yes', received_date=%s
-                             WHERE group_id=%s
-                               AND round_number=%s
-                               AND participant_id=%s
-                               AND received_yesno='No'
-                            """
-                            run_command(update_sql, (datetime.now().date(), group_id, selected_round, pid_))
-                            updated_recv = True
-
-                    if updated_recv:
-                        st.success("Selected participants marked as received!")
-                    else:
-                        st.info("No matching rows were updated.")
+            _report_changes(mark_received(group_id, rec_sel, round_numbers=[selected_round]), "received")
+
+# tab label -> (subheader, message when there are no groups, body)
+TRACKING_TABS = {
+    "Payments": ("Mark Payments", "No groups found.", payments_tab),
+    "Receivables": ("Mark Receivables", "No groups found for receivables.", receivables_tab),
+}
@@ -1,30 +1,27 @@
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-from datetime import datetime
-from db_handler import run_query
+from dashboard import fetch_dashboard_snapshot
 import plotly.express as px
 
 def visualization():
     st.title("📊 Data Visualization Dashboard")
 
+    # Every chart below reads from this one snapshot (single DB round trip)
+    snap = fetch_dashboard_snapshot()
+
     # ────────────────────────────────────────────────
     # 📌 1. Overview Metrics
     # ────────────────────────────────────────────────
     col1, col2, col3 = st.columns(3)
 
     # Total Groups
-    total_groups = run_query("SELECT COUNT(*) FROM groups")[0][0]
-    col1.metric("Total Groups", total_groups)
+    col1.metric("Total Groups", snap.total_groups)
 
     # Total Participants
-    total_participants = run_query("SELECT COUNT(*) FROM participants")[0][0]
-    col2.metric("Total Participants", total_participants)
+    col2.metric("Total Participants", snap.total_participants)
 
     # Total Contributions Paid vs Unpaid
-    paid_unpaid = run_query("SELECT COUNT(*) FILTER (WHERE paid_yesno='Yes'), COUNT(*) FILTER (WHERE paid_yesno='No') FROM contributions")[0]
-    col3.metric("Total Paid Contributions", paid_unpaid[0])
+    col3.metric("Total Paid Contributions", snap.paid_contributions)
     
     st.divider()
 
@@ -33,15 +30,8 @@ def visualization():
     # ────────────────────────────────────────────────
     st.subheader("📊 Groups vs Participants")
 
-    group_participant_data = run_query("""
-        SELECT g.group_name, COUNT(p.participant_id) as participant_count
-        FROM groups g
-        LEFT JOIN participants p ON g.group_id = p.group_id
-        GROUP BY g.group_name
-    """)
-
-    if group_participant_data:
-        df_gp = pd.DataFrame(group_participant_data, columns=["Group Name", "Participants"])
+    if not snap.participants_per_group.empty:
+        df_gp = snap.participants_per_group
         fig = px.bar(df_gp, x="Group Name", y="Participants", title="Participants per Group", text_auto=True)
         st.plotly_chart(fig, use_container_width=True)
     else:
@@ -54,17 +44,8 @@ def visualization():
     # ────────────────────────────────────────────────
     st.subheader("💰 Contributions Paid vs Unpaid (By Round)")
 
-    round_contributions = run_query("""
-        SELECT c.round_number, 
-               COUNT(*) FILTER (WHERE c.paid_yesno='Yes') as paid,
-               COUNT(*) FILTER (WHERE c.paid_yesno='No') as unpaid
-        FROM contributions c
-        GROUP BY c.round_number
-        ORDER BY c.round_number
-    """)
-
-    if round_contributions:
-        df_contrib = pd.DataFrame(round_contributions, columns=["Round", "Paid", "Unpaid"])
+    if not snap.round_contributions.empty:
+        df_contrib = snap.round_contributions
         fig = px.bar(df_contrib, x="Round", y=["Paid", "Unpaid"], barmode="stack", title="Paid vs Unpaid Contributions by Round")
         st.plotly_chart(fig, use_container_width=True)
     else:
@@ -77,14 +58,8 @@ def visualization():
     # ────────────────────────────────────────────────
     st.subheader("🥧 Receivables Status")
 
-    receivable_data = run_query("""
-        SELECT COUNT(*) FILTER (WHERE received_yesno='Yes') as received,
-               COUNT(*) FILTER (WHERE received_yesno='No') as not_received
-        FROM receivables
-    """)
-
-    if receivable_data:
-        df_recv = pd.DataFrame({"Status": ["Received", "Not Received"], "Count": list(receivable_data[0])})
+    if snap.received or snap.not_received:
+        df_recv = pd.DataFrame({"Status": ["Received", "Not Received"], "Count": [snap.received, snap.not_received]})
         fig = px.pie(df_recv, names="Status", values="Count", title="Receivables Status")
         st.plotly_chart(fig, use_container_width=True)
     else:
@@ -97,16 +72,8 @@ def visualization():
     # ────────────────────────────────────────────────
     st.subheader("📅 Upcoming Rounds")
 
-    round_schedule = run_query("""
-        SELECT g.group_name, r.round_number, r.round_date
-        FROM rounds r
-        JOIN groups g ON r.group_id = g.group_id
-        WHERE r.round_date >= CURRENT_DATE
-        ORDER BY r.round_date
-    """)
-
-    if round_schedule:
-        df_rounds = pd.DataFrame(round_schedule, columns=["Group", "Round", "Round Date"])
+    if not snap.upcoming_rounds.empty:
+        df_rounds = snap.upcoming_rounds
         fig = px.timeline(df_rounds, x_start="Round Date", x_end="Round Date", y="Group", color="Round", title="Upcoming Rounds")
         st.plotly_chart(fig, use_container_width=True)
     else: